@@ -0,0 +1,33 @@
+-- Tables created by the original renfield.sql. IF NOT EXISTS so databases set up with it are adopted as is
+
+CREATE TABLE IF NOT EXISTS vote_groups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    group_name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    creator_id BIGINT NOT NULL,
+    vote_name VARCHAR(255) NOT NULL,
+    group_id INT NULL,
+    options TEXT NOT NULL,  -- JSON array of options
+    is_active BOOLEAN DEFAULT TRUE,
+    FOREIGN KEY (group_id) REFERENCES vote_groups(id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS votes_users (
+    vote_id INT NOT NULL,
+    user_id BIGINT NOT NULL,  -- Use BIGINT for Discord user IDs
+    choice VARCHAR(255) NOT NULL,
+    PRIMARY KEY (vote_id, user_id),
+    FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
+);
+
+-- Final counts of ended votes
+CREATE TABLE IF NOT EXISTS vote_tallies (
+    vote_id INT NOT NULL,
+    choice VARCHAR(255) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (vote_id, choice),
+    FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
+);
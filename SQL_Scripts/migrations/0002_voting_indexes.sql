@@ -0,0 +1,10 @@
+-- TallyCache.load: SELECT vote_id, choice, COUNT(*) FROM votes_users GROUP BY vote_id, choice
+-- Covering, so the count is read from the index in group order without a temporary table
+CREATE INDEX idx_votes_users_vote_choice ON votes_users (vote_id, choice);
+
+-- Votes of a group, active ones first: WHERE group_id = ? [AND is_active = ?]
+-- Also serves the group_id foreign key
+CREATE INDEX idx_votes_group_active ON votes (group_id, is_active);
+
+-- BallotBuffer.load: SELECT id FROM votes WHERE is_active = TRUE, and the join on active votes
+CREATE INDEX idx_votes_active ON votes (is_active);
@@ -0,0 +1,48 @@
+-- Options get their own table with a small per-vote index. Ballots and final tallies reference
+-- the index instead of repeating the label. Needs MySQL 8.0.4+ for JSON_TABLE
+
+CREATE TABLE vote_options (
+    vote_id INT NOT NULL,
+    option_index TINYINT UNSIGNED NOT NULL,  -- Position of the option, also used in button custom IDs
+    label VARCHAR(255) NOT NULL,
+    PRIMARY KEY (vote_id, option_index),
+    FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
+);
+
+INSERT INTO vote_options (vote_id, option_index, label)
+SELECT v.id, o.position - 1, o.label
+FROM votes v,
+     JSON_TABLE(v.options, '$[*]' COLUMNS (position FOR ORDINALITY, label VARCHAR(255) PATH '$')) AS o;
+
+-- Ballots: map each label to its option index
+ALTER TABLE votes_users ADD COLUMN option_index TINYINT UNSIGNED NULL;
+
+UPDATE votes_users vu
+JOIN vote_options o ON o.vote_id = vu.vote_id AND o.label = vu.choice
+SET vu.option_index = o.option_index;
+
+-- A label matching none of the vote's options cannot be counted against any of them
+DELETE FROM votes_users WHERE option_index IS NULL;
+
+ALTER TABLE votes_users
+    MODIFY option_index TINYINT UNSIGNED NOT NULL,
+    DROP INDEX idx_votes_users_vote_choice,
+    DROP COLUMN choice,
+    ADD INDEX idx_votes_users_vote_option (vote_id, option_index);
+
+-- Final tallies: same conversion
+ALTER TABLE vote_tallies ADD COLUMN option_index TINYINT UNSIGNED NULL;
+
+UPDATE vote_tallies t
+JOIN vote_options o ON o.vote_id = t.vote_id AND o.label = t.choice
+SET t.option_index = o.option_index;
+
+DELETE FROM vote_tallies WHERE option_index IS NULL;
+
+ALTER TABLE vote_tallies
+    MODIFY option_index TINYINT UNSIGNED NOT NULL,
+    DROP PRIMARY KEY,
+    DROP COLUMN choice,
+    ADD PRIMARY KEY (vote_id, option_index);
+
+ALTER TABLE votes DROP COLUMN options;
@@ -0,0 +1,9 @@
+-- Messages showing a vote, edited with running counts while it is active
+
+CREATE TABLE vote_messages (
+    vote_id INT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    PRIMARY KEY (vote_id, message_id),
+    FOREIGN KEY (vote_id) REFERENCES votes(id) ON DELETE CASCADE
+);
@@ -0,0 +1,31 @@
+-- Roll history for /diceroller history: every roll, plus running totals per user
+
+CREATE TABLE dice_rolls (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    rolled_at DATETIME(3) NOT NULL,  -- UTC
+    dice TINYINT UNSIGNED NOT NULL,
+    difficulty TINYINT UNSIGNED NOT NULL,
+    speciality BOOLEAN NOT NULL,
+    successes SMALLINT NOT NULL,
+    botch BOOLEAN NOT NULL,
+    INDEX idx_dice_rolls_user (user_id, id)  -- Latest rolls of a user
+);
+
+-- Kept by adding each flushed batch, so stats never need a scan of dice_rolls
+CREATE TABLE dice_roll_stats (
+    user_id BIGINT PRIMARY KEY,
+    rolls INT UNSIGNED NOT NULL DEFAULT 0,
+    successes BIGINT NOT NULL DEFAULT 0,
+    botches INT UNSIGNED NOT NULL DEFAULT 0,
+    face_1 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_2 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_3 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_4 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_5 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_6 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_7 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_8 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_9 INT UNSIGNED NOT NULL DEFAULT 0,
+    face_10 INT UNSIGNED NOT NULL DEFAULT 0
+);
@@ -0,0 +1,3 @@
+-- A boolean on its own is too unselective for MySQL to use reliably; active votes are few
+-- and a scan of votes is cheap, so the index only cost writes
+DROP INDEX idx_votes_active ON votes;
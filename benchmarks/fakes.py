@@ -0,0 +1,116 @@
+"""Stand-ins for the Discord objects the command coroutines touch"""
+import itertools
+from types import SimpleNamespace
+
+_ids = itertools.count(10_000)
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embeds=None, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embeds = embeds or []
+        self.view = view
+        self.edits = 0
+
+    async def edit(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        self.edits += 1
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        if embeds is not None:
+            self.embeds = embeds
+        return self
+
+
+class FakeChannel:
+    def __init__(self):
+        self.id = next(_ids)
+        self.messages: dict[int, FakeMessage] = {}
+
+    def get_partial_message(self, message_id: int):
+        return self.messages[message_id]
+
+    async def send(self, content=None, **kwargs):
+        message = FakeMessage(self, content, kwargs.get("embeds"), kwargs.get("view"))
+        self.messages[message.id] = message
+        return message
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self._interaction.sent.append(content if content is not None else kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self._interaction.sent.append(content if content is not None else kwargs)
+        channel = self._interaction.channel
+        message = FakeMessage(channel, content, kwargs.get("embeds") or ([kwargs["embed"]] if "embed" in kwargs else None), kwargs.get("view"))
+        channel.messages[message.id] = message
+        return message
+
+
+class FakeInteraction:
+    """Enough of discord.Interaction for the cogs' command callbacks"""
+
+    def __init__(self, client, user_id: int, guild_id: int = 1, channel: FakeChannel | None = None):
+        self.client = client
+        self.user = SimpleNamespace(id=user_id, name=f"user{user_id}", roles=[])
+        self.guild_id = guild_id
+        self.guild = SimpleNamespace(id=guild_id)
+        self.channel = channel or FakeChannel()
+        self.channel_id = self.channel.id
+        self.command = None
+        self.data = {}
+        self.extras = {}
+        self.sent = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeTree:
+    def __init__(self):
+        self.commands = {}
+
+    def add_command(self, command, **kwargs):
+        self.commands[command.name] = command
+
+
+class FakeBot:
+    """Just the bot attributes the cogs use at construction time"""
+
+    def __init__(self, config, db):
+        self.config = config
+        self.db = db
+        self.tree = FakeTree()
+        self.cogs = {}
+        self.channel = FakeChannel()
+
+    def add_view(self, view, **kwargs):
+        pass
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id: int):
+        return self.channel if channel_id == self.channel.id else None
+
+    def dispatch(self, event: str, *args):
+        pass
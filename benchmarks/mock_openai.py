@@ -0,0 +1,73 @@
+"""Local server answering /v1/chat/completions with a fixed delay, so the ghoul path runs offline"""
+import asyncio
+import json
+import time
+from aiohttp import web
+
+
+class MockOpenAI:
+    def __init__(self, delay: float = 0.2, reply: str = "Yes, master.", host: str = "127.0.0.1", port: int = 0):
+        self.delay = delay
+        self.reply = reply
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _completion(self, request_body: dict):
+        return {
+            "id": f"chatcmpl-bench{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def _chunks(self, request: web.Request, request_body: dict):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = self.reply.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.delay / len(words))
+            chunk = {
+                "id": f"chatcmpl-bench{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request_body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def _handle(self, request: web.Request):
+        self.requests += 1
+        body = await request.json()
+        if body.get("stream"):
+            return await self._chunks(request, body)
+        await asyncio.sleep(self.delay)
+        return web.json_response(self._completion(body))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port; read back the one the OS chose
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,273 @@
+"""Offline load tests for the hot command paths
+
+Drives the real command coroutines with fake interactions, against an in-memory SQLite
+stand-in (or MySQL with --mysql) and a local mock of the OpenAI API, and reports
+throughput, latency percentiles and event loop lag per scenario.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --scenario vote_clicks --operations 20000 --concurrency 200
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+from fakes import FakeBot, FakeInteraction  # noqa: E402
+from mock_openai import MockOpenAI  # noqa: E402
+from sqlite_pool import SQLitePool  # noqa: E402
+from helper.config import Config  # noqa: E402
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer wakes up; anything blocking the loop shows up here"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self.lags.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def percentile(values: list[float], q: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(name: str, operation, operations: int, concurrency: int):
+    """Run operation(i) for i in range(operations) with at most concurrency in flight
+
+    Returns:
+        dict: Throughput, latency and loop lag of the run
+    """
+    latencies = []
+    counter = iter(range(operations))
+    monitor = LoopLagMonitor()
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - started)
+
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, operations))))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    return {
+        "scenario": name,
+        "operations": operations,
+        "ops_per_sec": round(operations / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "loop_lag_p99_ms": round(percentile(monitor.lags, 0.99) * 1000, 3),
+        "loop_lag_max_ms": round(max(monitor.lags, default=0.0) * 1000, 3),
+    }
+
+
+def seed_votes(db: SQLitePool, votes: int, voters: int, groups: int):
+    """Fill the stand-in with votes spread over groups and one ballot per voter per vote"""
+    options = ["Aye", "Nay", "Abstain"]
+    db.seed([
+        ("INSERT INTO vote_groups (group_name) VALUES (%s)", [(f"Group {g:04d}",) for g in range(groups)]),
+        ("INSERT INTO votes (creator_id, vote_name, group_id) VALUES (%s, %s, %s)",
+         [(1, f"Motion {v}", v % groups + 1) for v in range(votes)]),
+        ("INSERT INTO vote_options (vote_id, option_index, label) VALUES (%s, %s, %s)",
+         [(v + 1, index, label) for v in range(votes) for index, label in enumerate(options)]),
+        ("INSERT INTO votes_users (vote_id, user_id, option_index) VALUES (%s, %s, %s)",
+         [(v + 1, u, random.randrange(len(options))) for v in range(votes) for u in range(voters)]),
+    ])
+
+
+async def load_cog(bot: FakeBot, module: str, name: str):
+    cog = __import__(module, fromlist=[name])
+    instance = getattr(cog, name)(bot)
+    if hasattr(instance, "cog_load"):
+        await instance.cog_load()
+    bot.cogs[name] = instance
+    return instance
+
+
+async def scenario_vote_clicks(bot: FakeBot, args):
+    voting = await load_cog(bot, "cogs.voting", "Voting")
+    tally = voting.tallies.get(1)
+    buttons = voting.vote_view(tally).children
+    # A posted vote message, so clicks also drive the live count edits
+    message = await bot.channel.send("vote")
+    await voting.live.track(1, bot.channel.id, message.id)
+
+    async def click(i):
+        # Fresh users, so every click is a new ballot that goes through the buffer
+        interaction = FakeInteraction(bot, user_id=1_000_000 + i)
+        await random.choice(buttons).callback(interaction)
+
+    try:
+        return await measure("vote_clicks", click, args.operations, args.concurrency)
+    finally:
+        await voting.cog_unload()
+
+
+async def scenario_autocomplete(bot: FakeBot, args):
+    from cogs.voting import autocomplete_groups
+    voting = await load_cog(bot, "cogs.voting", "Voting")
+    prefixes = ["", "g", "Gro", "Group 0", "Group 01", "12", "zzz"]
+
+    async def complete(i):
+        await autocomplete_groups(FakeInteraction(bot, user_id=i), prefixes[i % len(prefixes)])
+
+    try:
+        return await measure("autocomplete", complete, args.operations, args.concurrency)
+    finally:
+        await voting.cog_unload()
+
+
+async def scenario_vote_results(bot: FakeBot, args):
+    voting = await load_cog(bot, "cogs.voting", "Voting")
+    group = bot.tree.commands["vote"]
+
+    async def results(i):
+        await group.vote_results.callback(group, FakeInteraction(bot, user_id=1), i % args.votes + 1)
+
+    try:
+        return await measure("vote_results", results, args.operations, args.concurrency)
+    finally:
+        await voting.cog_unload()
+
+
+async def scenario_dice(bot: FakeBot, args):
+    dice = await load_cog(bot, "cogs.diceroller", "DiceRoller")
+    group = bot.tree.commands["diceroller"]
+
+    async def roll(i):
+        # A few hundred players, so roll histories fill up and get written in batches
+        interaction = FakeInteraction(bot, user_id=i % 500)
+        kind = i % 3
+        if kind == 0:
+            await group.roll_dice.callback(group, interaction, random.randint(1, 20), random.randint(3, 12), bool(i & 1), None)
+        elif kind == 1:
+            await group.roll_bulk.callback(group, interaction, 20, random.randint(1, 10), 6, False)
+        else:
+            await group.roll_odds.callback(group, interaction, random.randint(1, 30), random.randint(2, 10), bool(i & 1))
+
+    try:
+        return await measure("dice", roll, args.operations, args.concurrency)
+    finally:
+        await dice.cog_unload()
+
+
+async def scenario_ghoul(bot: FakeBot, args):
+    ghoul = await load_cog(bot, "cogs.ghoul", "Ghoul")
+    group = bot.tree.commands["ghoul"]
+
+    async def talk(i):
+        await group.talk.callback(group, FakeInteraction(bot, user_id=i), "What are your orders?")
+
+    try:
+        # Network bound: fewer operations than the in-process scenarios
+        return await measure("ghoul", talk, max(1, args.operations // 50), args.concurrency)
+    finally:
+        await ghoul.cog_unload()
+
+
+SCENARIOS = {
+    "vote_clicks": scenario_vote_clicks,
+    "autocomplete": scenario_autocomplete,
+    "vote_results": scenario_vote_results,
+    "dice": scenario_dice,
+    "ghoul": scenario_ghoul,
+}
+
+
+def bench_config(spill_file: str, gpt_api_url: str, mysql: bool):
+    # Placeholders for settings the benchmarks never use; --mysql reads the real .env instead
+    for name, value in (("DISCORD_TOKEN", "bench"), ("DATABASE_USERNAME", "bench"), ("REQUIRED_ROLES", "Bench")):
+        os.environ.setdefault(name, value)
+    config = Config.from_env(None if mysql else os.devnull)
+    return dataclasses.replace(
+        config,
+        gpt_api_url=gpt_api_url,
+        openai_api_key="bench",
+        ballot_spill_file=spill_file,
+    )
+
+
+async def run_scenario(name: str, args, workdir: str, mock: MockOpenAI):
+    config = bench_config(os.path.join(workdir, f"{name}_spill.jsonl"), mock.url, args.mysql)
+    if args.mysql:
+        from helper.renfield_sql import Renfield_Pool
+        db = Renfield_Pool(config)
+    else:
+        db = SQLitePool()
+        seed_votes(db, args.votes, args.voters, args.groups)
+    try:
+        return await SCENARIOS[name](FakeBot(config, db), args)
+    finally:
+        await db.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="Scenario to run, repeatable. Defaults to all")
+    parser.add_argument("--operations", type=int, default=5000, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=100, help="Operations in flight at once")
+    parser.add_argument("--votes", type=int, default=200, help="Seeded votes")
+    parser.add_argument("--voters", type=int, default=500, help="Seeded ballots per vote")
+    parser.add_argument("--groups", type=int, default=50, help="Seeded vote groups")
+    parser.add_argument("--gpt-delay", type=float, default=0.2, help="Mock OpenAI response delay, in seconds")
+    parser.add_argument("--mysql", action="store_true", help="Use the database from .env instead of SQLite. Nothing is seeded")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(0)
+
+    mock = MockOpenAI(delay=args.gpt_delay)
+    await mock.start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in args.scenario or SCENARIOS:
+                result = await run_scenario(name, args, workdir, mock)
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(
+                        f"{result['scenario']:<14} {result['operations']:>7} ops  {result['ops_per_sec']:>10} ops/s"
+                        f"  p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms"
+                        f"  loop lag p99 {result['loop_lag_p99_ms']:>7} ms  max {result['loop_lag_max_ms']:>7} ms"
+                    )
+    finally:
+        await mock.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""Embedded stand-in for Renfield_Pool, backed by SQLite, for running benchmarks without MySQL"""
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+# Mirrors SQL_Scripts/migrations
+SCHEMA = """
+CREATE TABLE vote_groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_name VARCHAR(255) NOT NULL UNIQUE
+);
+CREATE TABLE votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creator_id BIGINT NOT NULL,
+    vote_name VARCHAR(255) NOT NULL,
+    group_id INT NULL REFERENCES vote_groups(id),
+    is_active BOOLEAN DEFAULT TRUE
+);
+CREATE TABLE vote_options (
+    vote_id INT NOT NULL REFERENCES votes(id),
+    option_index TINYINT NOT NULL,
+    label VARCHAR(255) NOT NULL,
+    PRIMARY KEY (vote_id, option_index)
+);
+CREATE TABLE votes_users (
+    vote_id INT NOT NULL REFERENCES votes(id),
+    user_id BIGINT NOT NULL,
+    option_index TINYINT NOT NULL,
+    PRIMARY KEY (vote_id, user_id)
+);
+CREATE TABLE vote_tallies (
+    vote_id INT NOT NULL REFERENCES votes(id),
+    option_index TINYINT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (vote_id, option_index)
+);
+CREATE TABLE vote_messages (
+    vote_id INT NOT NULL REFERENCES votes(id),
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    PRIMARY KEY (vote_id, message_id)
+);
+CREATE TABLE dice_rolls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id BIGINT NOT NULL,
+    rolled_at DATETIME NOT NULL,
+    dice TINYINT NOT NULL,
+    difficulty TINYINT NOT NULL,
+    speciality BOOLEAN NOT NULL,
+    successes SMALLINT NOT NULL,
+    botch BOOLEAN NOT NULL
+);
+CREATE TABLE dice_roll_stats (
+    user_id BIGINT PRIMARY KEY,
+    rolls INT NOT NULL DEFAULT 0,
+    successes INT NOT NULL DEFAULT 0,
+    botches INT NOT NULL DEFAULT 0,
+    face_1 INT NOT NULL DEFAULT 0,
+    face_2 INT NOT NULL DEFAULT 0,
+    face_3 INT NOT NULL DEFAULT 0,
+    face_4 INT NOT NULL DEFAULT 0,
+    face_5 INT NOT NULL DEFAULT 0,
+    face_6 INT NOT NULL DEFAULT 0,
+    face_7 INT NOT NULL DEFAULT 0,
+    face_8 INT NOT NULL DEFAULT 0,
+    face_9 INT NOT NULL DEFAULT 0,
+    face_10 INT NOT NULL DEFAULT 0
+);
+CREATE INDEX idx_dice_rolls_user ON dice_rolls (user_id, id);
+CREATE INDEX idx_votes_users_vote_option ON votes_users (vote_id, option_index);
+CREATE INDEX idx_votes_group_active ON votes (group_id, is_active);
+"""
+
+_UPSERT = re.compile(r"ON DUPLICATE KEY UPDATE\s+(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def translate(query: str):
+    """Rewrite the MySQL dialect used by the cogs into SQLite"""
+    query = query.replace("%s", "?")
+    query = re.sub(r"INSERT IGNORE", "INSERT OR IGNORE", query, flags=re.IGNORECASE)
+    match = _UPSERT.search(query)
+    if match:
+        assignments = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", match.group(1))
+        query = query[:match.start()] + "ON CONFLICT DO UPDATE SET " + assignments
+    return query
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLitePool:
+    """Same coroutine API as Renfield_Pool and Renfield_Connection, over one SQLite connection"""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = _dict_row
+        self._conn.executescript(SCHEMA)
+        # One worker thread, like a pool of one connection; keeps the loop thread free
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bench-sqlite")
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _fetchone(self, query, args):
+        return self._conn.execute(translate(query), args or ()).fetchone()
+
+    def _fetchall(self, query, args):
+        return self._conn.execute(translate(query), args or ()).fetchall()
+
+    def _execute(self, query, args):
+        return self._conn.execute(translate(query), args or ()).lastrowid
+
+    def _executemany(self, query, args):
+        return self._conn.executemany(translate(query), args).rowcount
+
+    async def fetchone(self, query: str, args=None):
+        return await self.run_blocking(self._fetchone, query, args)
+
+    async def fetchall(self, query: str, args=None):
+        return await self.run_blocking(self._fetchall, query, args)
+
+    async def execute(self, query: str, args=None):
+        return await self.run_blocking(self._execute, query, args)
+
+    async def executemany(self, query: str, args):
+        return await self.run_blocking(self._executemany, query, args)
+
+    @asynccontextmanager
+    async def connection(self):
+        yield self
+
+    def seed(self, statements: list[tuple[str, list]]):
+        """Bulk load rows synchronously before the benchmark starts
+
+        Args:
+            statements (list[tuple[str, list]]): Queries and their parameter sets
+        """
+        for query, rows in statements:
+            self._conn.executemany(translate(query), rows)
+
+    async def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
@@ -1,23 +1,37 @@
+import time
+STARTED = time.perf_counter()  # Before the other imports, so they are counted in the startup report
+
 import os
 import logging
 import asyncio
-from dotenv import load_dotenv
+import signal
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
+from helper.command_sync import CommandSync
+from helper.config import Config
+from helper.embed_pages import build_embed_pages
+from helper.log_pipeline import setup_logging
+from helper.metrics import InstrumentedTree, MetricsServer, metrics
+from helper.migrations import migrate_database
+from helper.renfield_sql import Renfield_Pool
+from helper.role_requirements import role_cache, role_check
+from helper.startup_timer import StartupTimer
 
-# Load environment variables
-load_dotenv()
-TOKEN = os.getenv("DISCORD_TOKEN")
-LOG_HOME = os.getenv("LOG_HOME")
-DISCORD_LOG = os.path.join(LOG_HOME, "discord.log") if LOG_HOME else "discord.log"
-
-# Set up logging
-logging.basicConfig(
-    filename=DISCORD_LOG,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
+# Loaded concurrently at startup, in no particular order
+EXTENSIONS = (
+    "cogs.voting",
+    "cogs.diceroller",
+    "cogs.ghoul",
+    "cogs.events",
 )
+
+# Load and validate the configuration once. Fails fast on bad settings
+config = Config.from_env()
+DISCORD_LOG = os.path.join(config.log_home, "discord.log") if config.log_home else "discord.log"
+
+# Set up logging: JSON lines written by a background thread, rotated and compressed
+log_listener = setup_logging(DISCORD_LOG, config)
 logger = logging.getLogger(__name__)
 
 # Set up bot intents
@@ -28,59 +42,182 @@ intents.dm_messages = True  # Can Send/Receive DMs Messages
 
 # Bot description and instance
 description = "GVLarp Discord Bot, Renfield 2.0"
-bot = commands.Bot(command_prefix=".", description=description, intents=intents)
+bot = commands.Bot(command_prefix=".", description=description, intents=intents, tree_cls=InstrumentedTree)
+bot.config = config  # Shared with every cog, replaced by reload_config()
+bot.db = None  # Shared Renfield_Pool, created in main()
+metrics_server = MetricsServer("127.0.0.1", config.metrics_port)
+command_sync = CommandSync(config.command_sync_file)
+startup = StartupTimer(STARTED)
+role_cache.configure(config.required_roles)
 
-@bot.event
-async def on_ready():
-    try:
-        # Sync global commands
-        await bot.tree.sync()
+
+def reload_config():
+    """Re-read the .env file and hand the new settings to every cog
+
+    Database credentials, pool size and the Discord token only change on restart
+
+    Raises:
+        ValueError: The new configuration is invalid. The current one stays in place
+    """
+    new_config = Config.from_env()
+    bot.config = new_config
+    role_cache.configure(new_config.required_roles)
+    bot.dispatch("config_reload", new_config)
+    logger.info("Configuration reloaded")
+
+async def sync_commands(force: bool = False):
+    """Sync global commands, and the configured guild's, when their definitions changed
+
+    Args:
+        force (bool, optional): Upload even if nothing changed. Defaults to False.
+    """
+    # Sync global commands
+    if await command_sync.sync(bot.tree, force=force):
         logger.info(f"Synced {len(bot.tree.get_commands())} global commands")
 
-        # If you want to sync for a specific guild (fast updates)
-        GUILD_ID = os.getenv("DISCORD_GUILD_ID")
-        if GUILD_ID:
-            guild = discord.Object(id=int(GUILD_ID))
-            await bot.tree.sync(guild=guild)
+    # If you want to sync for a specific guild (fast updates)
+    GUILD_ID = bot.config.discord_guild_id
+    if GUILD_ID:
+        guild = discord.Object(id=int(GUILD_ID))
+        if await command_sync.sync(bot.tree, guild=guild, force=force):
             logger.info(f"Synced commands for guild: {GUILD_ID}")
 
-        print(f"Logged in as {bot.user} - Ready!")
+
+@bot.event
+async def on_ready():
+    # on_ready fires again after every reconnect; unchanged commands are not re-uploaded
+    if not startup.done:
+        startup.mark("gateway")
+    try:
+        await sync_commands()
+        logger.info(f"Logged in as {bot.user} - Ready!")
     except Exception as e:
         logger.error(f"Failed to sync commands: {e}", exc_info=True)
-        
-    
-# Does not work? Unsure why
+    if not startup.done:
+        startup.mark("sync")
+        logger.info(startup.report())
+
+
+@bot.listen()
+async def on_app_command_completion(interaction: Interaction, command):
+    bot.tree.finish(interaction)
+
+
+# Keep cached permission checks in line with role changes
+@bot.listen()
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        role_cache.invalidate_member(after.guild.id, after.id)
+
+@bot.listen()
+async def on_member_remove(member: discord.Member):
+    role_cache.invalidate_member(member.guild.id, member.id)
+
+@bot.listen()
+async def on_guild_role_create(role: discord.Role):
+    role_cache.invalidate_guild(role.guild.id)
+
+@bot.listen()
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    role_cache.invalidate_guild(after.guild.id)
+
+@bot.listen()
+async def on_guild_role_delete(role: discord.Role):
+    role_cache.invalidate_guild(role.guild.id)
+
+
 @bot.tree.command(name="sync", description="Sync Commands")
+@role_check()
 async def sync(interaction: Interaction):
     await interaction.response.defer(thinking=True)
     try:
-        await bot.tree.sync()
+        await sync_commands(force=True)
         await interaction.followup.send("Commands successfully synchronized!")
     except Exception as e:
         logger.error(f"Failed to sync commands: {e}", exc_info=True)
         await interaction.followup.send(f"Failed to sync commands. Check logs for details.")
-    
+
+
+@bot.tree.command(name="reload_config", description="Reload settings from the .env file")
+@role_check()
+async def reload_config_command(interaction: Interaction):
+    try:
+        reload_config()
+        await interaction.response.send_message("Configuration reloaded!", ephemeral=True)
+    except ValueError as e:
+        logger.error(f"Failed to reload configuration: {e}")
+        await interaction.response.send_message(f"Configuration not reloaded: {e}", ephemeral=True)
+
+
+@bot.tree.command(name="stats", description="Show command, database and OpenAI latency")
+@role_check()
+async def stats(interaction: Interaction):
+    fields = metrics.summary()
+    if not fields:
+        await interaction.response.send_message("No commands recorded yet.", ephemeral=True)
+        return
+
+    pages = build_embed_pages("Renfield Stats", fields)
+    await interaction.response.send_message(embeds=pages[0], ephemeral=True)
+    for embeds in pages[1:]:
+        await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+
+def on_sighup():
+    try:
+        reload_config()
+    except ValueError as e:
+        logger.error(f"Failed to reload configuration: {e}")
+
+
+async def load_extension(name: str):
+    started = time.perf_counter()
+    await bot.load_extension(name)
+    logger.info(f"Loaded cog: {name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 
 async def main():
     try:
+        startup.mark("import")
         logger.info("Loading bot...")
 
         async with bot:
-            # Load cogs before running the bot
-            await bot.load_extension("cogs.voting")
-            logger.info("Loaded cog: cogs.voting")
-            await bot.load_extension("cogs.diceroller")
-            logger.info("Loaded cog: cogs.diceroller")
-            await bot.load_extension("cogs.ghoul")
-            logger.info("Loaded cog: cogs.ghoul")
-            await bot.load_extension("cogs.events")
-            logger.info("Loaded cog: cogs.events")
-
-            # Start bot
-            await bot.start(TOKEN)
+            # Shared connection pool used by every cog for database access
+            bot.db = Renfield_Pool(bot.config)
+
+            # Prometheus endpoint, localhost only. METRICS_PORT=0 turns it off
+            if bot.config.metrics_port:
+                await metrics_server.start()
+                logger.info(f"Serving metrics on http://127.0.0.1:{bot.config.metrics_port}/metrics")
+
+            # SIGHUP reloads the configuration (not available on Windows)
+            if hasattr(signal, "SIGHUP"):
+                asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, on_sighup)
+
+            # Bring the schema up to date before any cog queries it
+            if bot.config.database_migrate_on_start:
+                applied = await asyncio.to_thread(migrate_database, bot.config)
+                for migration in applied:
+                    logger.info(f"Applied migration {migration.version} {migration.name}")
+                startup.mark("migrate")
+
+            # Load cogs before running the bot. Their cog_load waits (database, odds precompute) overlap
+            await asyncio.gather(*(load_extension(name) for name in EXTENSIONS))
+            startup.mark("cog load")
+
+            # Start bot: bot.start() split in two so login is timed on its own
+            await bot.login(bot.config.discord_token)
+            startup.mark("login")
+            await bot.connect()
 
     except Exception as e:
         logger.error(f"Bot encountered an error: {e}", exc_info=True)
+    finally:
+        await metrics_server.stop()
+        if bot.db is not None:
+            await bot.db.close()
+        # Drain queued log records before exiting
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,43 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
-import random
+import asyncio
+from helper.dice_engine import DiceEngine, split_difficulty
+from helper.dice_odds import odds, precompute, set_cache_size
+from helper.embed_pages import build_embed_pages
+from helper.roll_history import RollLog
+
+RECENT_ROLLS_SHOWN = 10
+
+
+def format_faces(faces: list[int], difficulty: int, speciality: bool):
+    """Format rolled faces: botches struck through, speciality 10s bold, successes italic
+
+    Args:
+        faces (list[int]): Rolled faces
+        difficulty (int): Target number the faces were rolled against
+        speciality (bool): Whether a speciality is applied
+
+    Returns:
+        str: Formatted faces
+    """
+    return ", ".join(
+        f"~~{x}~~" if x == 1 else
+        f"**{x}**" if x == 10 and speciality else
+        f"*{x}*" if x >= difficulty else
+        str(x)
+        for x in faces
+    )
+
 
 class DiceRollerCommands(app_commands.Group):
+    def __init__(self, engine: DiceEngine, rolls: RollLog, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+        self.rolls = rolls
+
     @app_commands.command(name="roll", description="Roll a number of dice at X difficulty")
-    async def roll_dice(self, interaction: Interaction, number_of_dice: int, difficulty: int , speciality: bool, comment: str | None):
+    async def roll_dice(self, interaction: Interaction, number_of_dice: app_commands.Range[int, 1, 100], difficulty: int , speciality: bool, comment: str | None):
         """Rolls a number of dice at a specified difficulty
 
         Args:
@@ -17,32 +49,14 @@ class DiceRollerCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        results = [random.randint(1, 10) for _ in range(number_of_dice)]
+        faces, successes = self.engine.roll_pools([number_of_dice], difficulty, speciality)
+        results, successes = faces[0], successes[0]
+        self.rolls.record(interaction.user.id, results, difficulty, speciality, successes)
 
-        # Successes calculation
-        successes = 0
-        difficulty_penalty = max(0, difficulty - 10)  # Handle extreme difficulty
-        difficulty = min(difficulty, 10)  # Ensure difficulty is in valid range
-
-        for roll in results:
-            if roll >= difficulty:
-                if roll == 10 and speciality:
-                    successes += 2  # Double success for 10s if special
-                else:
-                    successes += 1
-            if roll == 1:
-                successes -= 1  # 1s count as botches
-
-        successes -= difficulty_penalty  # Apply any penalties
+        difficulty, _ = split_difficulty(difficulty)  # Ensure difficulty is in valid range
 
         # Formatting roll results
-        roll_text = ", ".join(
-            f"~~{x}~~" if x == 1 else
-            f"**{x}**" if x == 10 and speciality else
-            f"*{x}*" if x >= difficulty else
-            str(x)
-            for x in results
-        )
+        roll_text = format_faces(results, difficulty, speciality)
 
         # Embed message creation
         embed = discord.Embed(
@@ -55,15 +69,122 @@ class DiceRollerCommands(app_commands.Group):
         embed.set_footer(text="Comment: -")  # Placeholder for additional info
 
         await interaction.followup.send(embed=embed)
-            
-            
+
+    @app_commands.command(name="bulk", description="Roll the same pool for many characters at once")
+    async def roll_bulk(self, interaction: Interaction, pools: app_commands.Range[int, 1, 100], number_of_dice: app_commands.Range[int, 1, 100], difficulty: int, speciality: bool, label: str = "NPC"):
+        """Rolls several identical pools in one batch, e.g. for a group of NPCs
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            pools (int): Number of pools to roll
+            number_of_dice (int): Number of dice in each pool
+            difficulty (int): Difficulty to roll the dice
+            speciality (bool): Whether a speciality is applied
+            label (str, optional): Name prefix for each pool. Defaults to "NPC".
+        """
+        await interaction.response.defer(thinking=True)
+
+        faces, successes = self.engine.roll_pools([number_of_dice] * pools, difficulty, speciality)
+        target, _ = split_difficulty(difficulty)
+
+        fields = [
+            (f"{label} {number}: {net} successes", format_faces(rolled, target, speciality))
+            for number, (rolled, net) in enumerate(zip(faces, successes), start=1)
+        ]
+
+        for embeds in build_embed_pages(f"{interaction.user.name}'s Bulk Roll (Difficulty {target})", fields, discord.Color.dark_grey()):
+            await interaction.followup.send(embeds=embeds)
+
+    @app_commands.command(name="history", description="Your recent rolls and luck statistics")
+    async def roll_history(self, interaction: Interaction, user: discord.User | None = None):
+        """Shows the recent rolls of a user with their mean successes, botch rate and face distribution
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            user (discord.User | None, optional): Whose rolls to show. Defaults to the caller.
+        """
+        await interaction.response.defer(thinking=True)
+
+        user = user or interaction.user
+        history = await self.rolls.history(user.id)
+
+        if not history.rolls:
+            await interaction.followup.send(f"{user.name} has no rolls yet.", ephemeral=True)
+            return
+
+        recent = "\n".join(
+            f"<t:{int(roll['rolled_at'])}:R> {roll['dice']} dice at {roll['difficulty']}: "
+            f"{'**Botch**' if roll['botch'] else str(roll['successes']) + ' successes'}"
+            for roll in history.recent(RECENT_ROLLS_SHOWN)
+        )
+        embed = discord.Embed(title=f"{user.name}'s Rolls", color=discord.Color.dark_grey())
+        embed.add_field(name="Rolls", value=str(history.rolls), inline=True)
+        embed.add_field(name="Mean Successes", value=f"{history.mean_successes:.2f}", inline=True)
+        embed.add_field(name="Botch Rate", value=f"{history.botch_rate:.1%}", inline=True)
+        embed.add_field(name="Recent", value=recent or "-", inline=False)
+        # A fair die shows each face 10% of the time
+        total_faces = int(history.faces.sum())
+        if total_faces:
+            faces = "\n".join(f"{face:>2} | {count / total_faces:>6.1%}" for face, count in enumerate(history.faces.tolist(), start=1))
+            embed.add_field(name="Faces", value=f"```\n{faces}\n```", inline=False)
+
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="odds", description="Exact odds for a number of dice at X difficulty")
+    async def roll_odds(self, interaction: Interaction, number_of_dice: app_commands.Range[int, 1, 100], difficulty: int, speciality: bool):
+        """Shows the exact distribution of net successes and the botch chance for a pool
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            number_of_dice (int): Number of dice to roll
+            difficulty (int): Difficulty to roll the dice
+            speciality (bool): Whether a speciality is applied
+        """
+        result = odds(number_of_dice, difficulty, speciality)
+
+        # Build the table from the top so "at least" is a running sum. Long tails are skipped to keep it readable
+        rows = []
+        at_least = 0
+        for net, p in sorted(result.distribution.items(), reverse=True):
+            at_least += p
+            if p >= 0.0005:
+                rows.append(f"{net:>4} | {float(p):>7.2%} | {float(at_least):>7.2%}")
+        table = "\n".join([" Net |   Exact | At least"] + rows[::-1])
+
+        embed = discord.Embed(
+            title=f"Odds: {number_of_dice} dice at difficulty {difficulty}{' with speciality' if speciality else ''}",
+            description=f"```\n{table}\n```",
+            color=discord.Color.dark_grey()
+        )
+        embed.add_field(name="At least one success", value=f"{float(result.at_least(1)):.2%}", inline=True)
+        embed.add_field(name="Botch", value=f"{float(result.botch):.2%}", inline=True)
+
+        await interaction.response.send_message(embed=embed)
 
 
 class DiceRoller(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bot.tree.add_command(DiceRollerCommands(name="diceroller"))
-        
-        
+        self.engine = DiceEngine()
+        config = bot.config
+        self.rolls = RollLog(bot.db, config.dice_history_size, config.dice_history_users, config.dice_history_flush_interval)
+        self.bot.tree.add_command(DiceRollerCommands(self.engine, self.rolls, name="diceroller"))
+
+    async def cog_load(self):
+        set_cache_size(self.bot.config.odds_cache_size)
+        self.rolls.start()
+        # Warm the odds cache for common pool sizes off the event loop
+        await asyncio.to_thread(precompute, self.bot.config.odds_precompute_dice)
+
+    async def cog_unload(self):
+        await self.rolls.close()
+
+    @commands.Cog.listener()
+    async def on_config_reload(self, config):
+        self.rolls.capacity = config.dice_history_size
+        self.rolls.max_users = config.dice_history_users
+        self.rolls.flush_interval = config.dice_history_flush_interval
+
+
 async def setup(bot):
-    await bot.add_cog(DiceRoller(bot))
\ No newline at end of file
+    await bot.add_cog(DiceRoller(bot))
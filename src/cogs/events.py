@@ -2,13 +2,25 @@ import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
 from datetime import datetime, timedelta, timezone
-import os
-from dotenv import load_dotenv
+import logging
+from helper.embed_pages import EmbedPaginator, build_embed_pages
+from helper.event_index import EventIndex
+from helper.event_scheduler import MAX_BATCH, EventBatch, EventScheduler, EventSpec, parse_events, parse_time, resolve_channel, series
 from helper.role_requirements import role_check
 
+logger = logging.getLogger(__name__)
+
+EVENTS_PER_PAGE = 10
+
+
 class EventCommands(app_commands.Group):
     """Group for handling event-related commands."""
 
+    def __init__(self, index: EventIndex, scheduler: EventScheduler, **kwargs):
+        super().__init__(**kwargs)
+        self.index = index
+        self.scheduler = scheduler
+
     @app_commands.command(name="create", description="Create a new Discord event")
     @role_check()
     async def create_event(
@@ -47,41 +59,114 @@ class EventCommands(app_commands.Group):
                 await interaction.followup.send("This command must be used in a server.")
                 return
 
-            load_dotenv()
-
-            VOICE_CHANNEL = os.getenv("DEFAULT_VOICE_CHANNEL_ID")
-            channel = await guild.fetch_channel(VOICE_CHANNEL)
-            
-            if(channel == None):
-                await interaction.followup.send(f"Event Not Created, Channel Does Not Exist {VOICE_CHANNEL}")
-                
-            event_params = {
-                "name":name,
-                "description":description,
-                "start_time":event_time,
-                "end_time":end_time,
-                "entity_type":discord.EntityType.external if location != "Discord" else discord.EntityType.voice,
-                "privacy_level":discord.PrivacyLevel.guild_only
-            }
-            
-            if(location != "Discord"):
-                event_params["location"] = location
-            else:
-                event_params["channel"] = channel
+            channel = None
+            if location == "Discord":
+                VOICE_CHANNEL = interaction.client.config.default_voice_channel_id
+                channel = await resolve_channel(guild, VOICE_CHANNEL)
+                if channel is None:
+                    await interaction.followup.send(f"Event Not Created, Channel Does Not Exist {VOICE_CHANNEL}")
+                    return
 
-            event = await guild.create_scheduled_event(**event_params)
+            spec = EventSpec(name, description, event_time, end_time, location)
+            await guild.create_scheduled_event(**spec.params(channel))
             
             await interaction.followup.send(f"Event **{name}** has been created! Start time: {event_time.strftime('%Y-%m-%d %H:%M UTC')}")
 
         except discord.HTTPException as e:
+            logger.warning(f"Failed to create event {name}: {e}")
             await interaction.followup.send(f"Failed to create event: {e}")
 
+    @app_commands.command(name="schedule", description="Create a weekly series or import a list of events")
+    @role_check()
+    async def schedule_events(
+        self,
+        interaction: Interaction,
+        name: str = None,
+        start_time: str = None,
+        duration: app_commands.Range[int, 1] = None,  # Duration in minutes
+        occurrences: app_commands.Range[int, 1, MAX_BATCH] = 1,
+        interval_days: app_commands.Range[int, 1, 365] = 7,
+        description: str = "",
+        location: str = "Discord",
+        events: str = None,
+        file: discord.Attachment = None,
+    ):
+        """Queues many events for creation: a recurring series, or a list pasted into events or attached as file
+
+        Each list entry is `YYYY-MM-DD HH:MM | duration | name | description | location`, one per line
+        (or separated by ; when pasted); description and location are optional.
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            name (str, optional): Series Name. Defaults to None.
+            start_time (str, optional): First Start Time of the series (YYYY-MM-DD HH:MM). Defaults to None.
+            duration (int, optional): Duration of each Event (Minutes). Defaults to None.
+            occurrences (int, optional): Number of Events in the series. Defaults to 1.
+            interval_days (int, optional): Days between Events in the series. Defaults to 7.
+            description (str, optional): Series Description. Defaults to "".
+            location (str, optional): Series Location. Defaults to "Discord".
+            events (str, optional): Pasted event list. Defaults to None.
+            file (discord.Attachment, optional): Uploaded event list, UTF-8 text. Defaults to None.
+        """
+        await interaction.response.defer(thinking=True)
+
+        guild = interaction.guild
+        if not guild:
+            await interaction.followup.send("This command must be used in a server.")
+            return
+
+        if events or file:
+            text = events or ""
+            if file:
+                try:
+                    text += "\n" + (await file.read()).decode("utf-8")
+                except (discord.HTTPException, UnicodeDecodeError) as e:
+                    await interaction.followup.send(f"Could not read {file.filename}: {e}")
+                    return
+            specs, errors = parse_events(text)
+            if errors:
+                await interaction.followup.send("Nothing was scheduled, fix these entries first:\n" + "\n".join(errors[:20]))
+                return
+        elif name and start_time and duration is not None:
+            try:
+                start = parse_time(start_time)
+            except ValueError:
+                await interaction.followup.send("Invalid time format. Use `YYYY-MM-DD HH:MM` (24-hour format, UTC).")
+                return
+            specs = series(name, description, start, duration, occurrences, interval_days, location)
+        else:
+            await interaction.followup.send("Give a name, start_time and duration for a series, or an event list in events or file.")
+            return
+
+        if not specs:
+            await interaction.followup.send("No events to schedule.")
+            return
+        if len(specs) > MAX_BATCH:
+            await interaction.followup.send(f"At most {MAX_BATCH} events can be scheduled at once, got {len(specs)}.")
+            return
+
+        channel = None
+        if any(spec.location == "Discord" for spec in specs):
+            VOICE_CHANNEL = interaction.client.config.default_voice_channel_id
+            channel = await resolve_channel(guild, VOICE_CHANNEL)
+            if channel is None:
+                await interaction.followup.send(f"Events Not Created, Channel Does Not Exist {VOICE_CHANNEL}")
+                return
+
+        message = await interaction.followup.send(f"Queued {len(specs)} events.", wait=True)
+        batch = EventBatch(guild, specs, channel, message)
+        ahead = self.scheduler.submit(batch)
+        if ahead:
+            await message.edit(content=f"Queued {len(specs)} events behind {ahead} other batch{'es' if ahead > 1 else ''}.")
+
     @app_commands.command(name="list", description="List upcoming Discord events")
-    async def list_events(self, interaction: Interaction):
-        """List all upcoming events in the guild
+    async def list_events(self, interaction: Interaction, after: str = None, before: str = None):
+        """List the guild's events in start time order, optionally within a time range
 
         Args:
             interaction (Interaction): Discord Interaction Variable
+            after (str, optional): Only events starting at or after this time (YYYY-MM-DD [HH:MM], UTC). Defaults to None.
+            before (str, optional): Only events starting at or before this time (YYYY-MM-DD [HH:MM], UTC). Defaults to None.
         """
         await interaction.response.defer(thinking=True)
         
@@ -90,20 +175,27 @@ class EventCommands(app_commands.Group):
             await interaction.followup.send("This command must be used in a server.")
             return
 
-        events = guild.scheduled_events
+        try:
+            start = parse_time(after) if after else None
+            end = parse_time(before) if before else None
+        except ValueError:
+            await interaction.followup.send("Invalid time format. Use `YYYY-MM-DD` or `YYYY-MM-DD HH:MM` (24-hour format, UTC).")
+            return
+
+        events = self.index.between(guild.id, start, end)
         if not events:
             await interaction.followup.send("No upcoming events found.")
             return
 
-        embed = discord.Embed(title="Upcoming Events", color=discord.Color.blue())
-        for event in events:
-            embed.add_field(
-                name=event.name,
-                value=f"**Starts:** {event.start_time.strftime('%Y-%m-%d %H:%M UTC')}\n**Location:** {event.location if event.location else 'Discord Voice Channel'}\n**Description:** {event.description or 'No description'}\n**ID** {event.id}",
-                inline=False
+        fields = [
+            (
+                event.name,
+                f"**Starts:** {event.start_time.strftime('%Y-%m-%d %H:%M UTC')}\n**Location:** {event.location if event.location else 'Discord Voice Channel'}\n**Description:** {event.description or 'No description'}\n**ID** {event.id}",
             )
-
-        await interaction.followup.send(embed=embed)
+            for event in events
+        ]
+        embeds = [embed for message in build_embed_pages("Upcoming Events", fields, per_embed=EVENTS_PER_PAGE) for embed in message]
+        await EmbedPaginator(embeds, interaction.user.id).send(interaction)
 
     @app_commands.command(name="delete", description="Delete an existing Discord event")
     @role_check()
@@ -121,7 +213,7 @@ class EventCommands(app_commands.Group):
             await interaction.followup.send("This command must be used in a server.")
             return
 
-        event = guild.get_scheduled_event(int(event_id))
+        event = self.index.get(guild.id, int(event_id)) if event_id.isdigit() else None
         if not event:
             await interaction.followup.send("No event found with that ID.")
             return
@@ -130,6 +222,7 @@ class EventCommands(app_commands.Group):
             await event.delete()
             await interaction.followup.send(f"Event **{event.name}** has been deleted.")
         except discord.HTTPException as e:
+            logger.warning(f"Failed to delete event {event_id}: {e}")
             await interaction.followup.send(f"Failed to delete event: {e}")
 
     @app_commands.command(name="edit", description="Edit an existing event's details")
@@ -137,7 +230,7 @@ class EventCommands(app_commands.Group):
     async def edit_event(
         self, 
         interaction: Interaction, 
-        event_id: int, 
+        event_id: str, 
         new_name: str = None, 
         new_description: str = None, 
         new_start_time: str = None, 
@@ -152,7 +245,7 @@ class EventCommands(app_commands.Group):
             await interaction.followup.send("This command must be used in a server.")
             return
 
-        event = discord.utils.get(await guild.scheduled_events(), id=event_id)
+        event = self.index.get(guild.id, int(event_id)) if event_id.isdigit() else None
         if not event:
             await interaction.followup.send("⚠️ No event found with that ID.")
             return
@@ -173,7 +266,7 @@ class EventCommands(app_commands.Group):
             updates["end_time"] = updates["start_time"] + timedelta(minutes=new_duration)
         if new_location:
             updates["entity_type"] = (
-                discord.GuildScheduledEventEntityType.external if new_location != "Discord" else discord.GuildScheduledEventEntityType.voice
+                discord.EntityType.external if new_location != "Discord" else discord.EntityType.voice
             )
             updates["location"] = new_location if new_location != "Discord" else None
 
@@ -181,6 +274,7 @@ class EventCommands(app_commands.Group):
             await event.edit(**updates)
             await interaction.followup.send(f"✏️ Event **{event.name}** has been updated!")
         except discord.HTTPException as e:
+            logger.warning(f"Failed to edit event {event_id}: {e}")
             await interaction.followup.send(f"⚠️ Failed to edit event: {e}")
 
 
@@ -189,7 +283,49 @@ class Events(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.bot.tree.add_command(EventCommands(name="events"))  # Register the event group
+        self.index = EventIndex()
+        self.scheduler = EventScheduler()
+        self.bot.tree.add_command(EventCommands(self.index, self.scheduler, name="events"))  # Register the event group
+
+    async def cog_load(self):
+        self.scheduler.start()
+        # Loaded after login on a reload, when on_ready has already fired
+        for guild in self.bot.guilds:
+            self.index.load(guild)
+
+    async def cog_unload(self):
+        await self.scheduler.close()
+
+    # The index is filled from the guild cache once and then kept current by gateway events,
+    # so commands never fetch events over HTTP
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self.index.load(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.index.load(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.index.drop(guild.id)
+
+    @commands.Cog.listener()
+    async def on_scheduled_event_create(self, event: discord.ScheduledEvent):
+        self.index.add(event)
+
+    @commands.Cog.listener()
+    async def on_scheduled_event_update(self, before: discord.ScheduledEvent, after: discord.ScheduledEvent):
+        # Completed and cancelled events no longer appear in the guild's list
+        if after.status in (discord.EventStatus.completed, discord.EventStatus.cancelled):
+            self.index.remove(after)
+        else:
+            self.index.add(after)
+
+    @commands.Cog.listener()
+    async def on_scheduled_event_delete(self, event: discord.ScheduledEvent):
+        self.index.remove(event)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Events(bot))
@@ -2,21 +2,94 @@ import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
 import asyncio
+import logging
 import random
-from helper.gpt_connection import gpt_response
+from contextlib import aclosing
+from helper.ghoul_memory import ConversationStore, ResponseCache
+from helper.gpt_connection import GPT_Connection
+from helper.metrics import metrics
+from helper.stream_reply import StreamedReply
 import os
 
+logger = logging.getLogger(__name__)
+
 class GhoulCommands(app_commands.Group):
+    def __init__(self, gpt: GPT_Connection, memory: ConversationStore, cache: ResponseCache, **kwargs):
+        super().__init__(**kwargs)
+        self.gpt = gpt
+        self.memory = memory
+        self.cache = cache
+
     @app_commands.command(name="talk", description="I will respond to your question")
     async def talk(self, interaction: Interaction, message: str):
         await interaction.response.defer(thinking=True)
-        response = gpt_response(message, interaction, content=None)
-        await interaction.followup.send(response)
+        # The reply is shown as it is generated, replacing the "thinking..." message
+        reply = StreamedReply(interaction, interval=interaction.client.config.openai_stream_edit_interval)
+        history = self.memory.history(interaction.user.id, interaction.channel_id)
+        persona = self.gpt.persona(interaction)
+
+        # A cached reply only fits when the question opens a conversation
+        cached = None if history else self.cache.get(persona, message)
+        if cached is not None:
+            metrics.gpt_cache.inc("hit")
+            await reply.append(cached)
+            await reply.finish()
+            self.memory.add(interaction.user.id, interaction.channel_id, message, cached)
+            return
+        if not history:
+            metrics.gpt_cache.inc("miss")
+
+        pieces_received = []
+        try:
+            async with aclosing(self.gpt.stream(message, interaction, content=None, history=history)) as pieces:
+                async for piece in pieces:
+                    pieces_received.append(piece)
+                    await reply.append(piece)
+        except asyncio.TimeoutError:
+            logger.warning("OpenAI request timed out")
+            if not reply.sent and not reply.text.strip():
+                await interaction.followup.send("Renfield is busy with his master's errands. Try again shortly.")
+                return
+            # Partial replies are shown but not remembered
+            await reply.finish()
+            return
+
+        full_reply = "".join(pieces_received)
+        if not full_reply.strip():
+            logger.warning("OpenAI returned an empty reply")
+            await interaction.followup.send("Renfield stares at you blankly. Try asking again.")
+            return
+        await reply.finish()
+
+        self.memory.add(interaction.user.id, interaction.channel_id, message, full_reply)
+        if not history:
+            self.cache.put(persona, message, full_reply)
+
+    @app_commands.command(name="forget", description="Make me forget our conversation in this channel")
+    async def forget(self, interaction: Interaction):
+        self.memory.forget(interaction.user.id, interaction.channel_id)
+        await interaction.response.send_message("Forgotten, master.", ephemeral=True)
 
 class Ghoul(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bot.tree.add_command(GhoulCommands(name="ghoul"))
+        config = bot.config
+        self.gpt = GPT_Connection(config)
+        self.memory = ConversationStore(config.ghoul_memory_tokens, config.ghoul_memory_ttl, config.ghoul_memory_max_tokens)
+        self.cache = ResponseCache(config.ghoul_cache_size, config.ghoul_cache_ttl)
+        self.bot.tree.add_command(GhoulCommands(self.gpt, self.memory, self.cache, name="ghoul"))
+
+    @commands.Cog.listener()
+    async def on_config_reload(self, config):
+        self.gpt.configure(config)
+        self.memory.token_budget = config.ghoul_memory_tokens
+        self.memory.ttl = config.ghoul_memory_ttl
+        self.memory.max_total_tokens = config.ghoul_memory_max_tokens
+        self.cache.max_entries = config.ghoul_cache_size
+        self.cache.ttl = config.ghoul_cache_ttl
+
+    async def cog_unload(self):
+        await self.gpt.close()
 
 async def setup(bot):
     await bot.add_cog(Ghoul(bot))
@@ -1,11 +1,23 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
-import json
-from typing import List
-from helper.renfield_sql import Renfield_SQL
+import logging
+import os
+from typing import List, Literal
+from helper.vote_groups import GroupIndex
+from helper.ballot_buffer import BallotBuffer, BallotStatus
+from helper.vote_tally import TallyCache, VoteTally
+from helper.vote_live import LiveVoteMessages, render_vote
+from helper.vote_export import export_ballots
+from helper.embed_pages import build_embed_pages
 from helper.role_requirements import role_check
+from helper.log_pipeline import log_context
 
+logger = logging.getLogger(__name__)
+
+MAX_OPTIONS = 25
+MAX_OPTION_LENGTH = 80
+EXPORT_SIZE_LIMIT = 10 * 1024 * 1024  # Discord's upload limit outside boosted guilds
 
 
 async def autocomplete_groups(interaction: Interaction, current: str):
@@ -13,33 +25,41 @@ async def autocomplete_groups(interaction: Interaction, current: str):
 
     Args:
         interaction (Interaction): Discord Interaction Variable
-        current (str): _description_
+        current (str): Text typed so far
 
     Returns:
         _type_: Autocomplete Dropdown Info
     """
-    db = Renfield_SQL()
-    cursor = db.connect()
-
-    cursor.execute("SELECT group_name FROM vote_groups WHERE group_name LIKE %s LIMIT 10", (f"%{current}%",))
-    groups = cursor.fetchall()
-
-    db.disconnect()
+    groups = interaction.client.get_cog("Voting").groups.search(current)
 
-    return [app_commands.Choice(name=g["group_name"], value=g["group_name"]) for g in groups]
+    return [app_commands.Choice(name=g, value=g) for g in groups]
 
 
 class VoteButtons(discord.ui.View):
-    def __init__(self, vote_id: int, options: List[str]):
-        super().__init__()
+    def __init__(self, voting: "Voting", vote_id: int, options: List[str]):
+        # Persistent: no timeout, and every button has a stable custom_id so clicks survive restarts
+        super().__init__(timeout=None)
         self.vote_id = vote_id
-        for option in options:
-            self.add_item(VoteButton(option, vote_id))
+        # Votes created before the option limits existed can have more options than a view holds
+        if len(options) > MAX_OPTIONS:
+            logger.warning(f"Vote #{vote_id} has {len(options)} options, only the first {MAX_OPTIONS} get buttons")
+        for index, option in enumerate(options[:MAX_OPTIONS]):
+            self.add_item(VoteButton(voting, option, vote_id, index))
+
+    async def interaction_check(self, interaction: Interaction):
+        # Tag log lines written while handling the click
+        log_context.set({"command": f"vote button #{self.vote_id}", "guild_id": interaction.guild_id, "user_id": interaction.user.id})
+        return True
 
 class VoteButton(discord.ui.Button):
-    def __init__(self, label: str, vote_id: int):
-        super().__init__(label=label, style=discord.ButtonStyle.primary)
+    def __init__(self, voting: "Voting", label: str, vote_id: int, index: int):
+        # Discord caps button labels at 80 characters; older votes may have longer options
+        short_label = label if len(label) <= MAX_OPTION_LENGTH else label[:MAX_OPTION_LENGTH - 1] + "…"
+        super().__init__(label=short_label, style=discord.ButtonStyle.primary, custom_id=f"vote:{vote_id}:{index}")
+        self.option = label
+        self.voting = voting
         self.vote_id = vote_id
+        self.index = index
 
     async def callback(self, interaction: Interaction):
         """The callback function for whenever the vote button is clicked
@@ -47,45 +67,25 @@ class VoteButton(discord.ui.Button):
         Args:
             interaction (Interaction): Discord Interaction Variable
         """
-        await interaction.response.defer(ephemeral=True)
-        db = Renfield_SQL()
-        cursor = db.connect()
-
-        try:
-            cursor.execute("SELECT is_active FROM votes WHERE id = %s", (self.vote_id,))
-            vote = cursor.fetchone()
-
-            if not vote or not vote["is_active"]:
-                await interaction.followup.send("This vote has ended!", ephemeral=True)
-                return
-
-            user_id = interaction.user.id
-
-            cursor.execute(
-                "SELECT * FROM votes_users WHERE vote_id = %s AND user_id = %s",
-                (self.vote_id, user_id),
-            )
-            existing_vote = cursor.fetchone()
-
-            if existing_vote:
-                await interaction.followup.send("You have already voted!", ephemeral=True)
-            else:
-                cursor.execute(
-                    "INSERT INTO votes_users (vote_id, user_id, choice) VALUES (%s, %s, %s)",
-                    (self.vote_id, user_id, self.label),
-                )
-                db.commit()
-                await interaction.followup.send(f"You voted for {self.label}!", ephemeral=True)
-
-        except Exception as e:
-            await interaction.followup.send("An error occurred while processing your vote.", ephemeral=True)
-            print(f"Error in voting callback: {e}")
-
-        finally:
-            db.disconnect()
+        # Ballots are accepted in memory and written by the BallotBuffer flusher
+        voting = self.voting
+        status = voting.ballots.submit(self.vote_id, interaction.user.id, self.index)
+
+        if status is BallotStatus.ENDED:
+            await interaction.response.send_message("This vote has ended!", ephemeral=True)
+        elif status is BallotStatus.DUPLICATE:
+            await interaction.response.send_message("You have already voted!", ephemeral=True)
+        else:
+            voting.tallies.record(self.vote_id, self.index)
+            voting.live.changed(self.vote_id)
+            await interaction.response.send_message(f"You voted for {self.option}!", ephemeral=True)
 
 class VoteCommands(app_commands.Group):
-    
+    def __init__(self, voting: "Voting", **kwargs):
+        super().__init__(**kwargs)
+        self.voting = voting
+        self.db = voting.db
+
     @app_commands.command(name="new", description="Start a new vote")
     @role_check()
     @app_commands.autocomplete(group=autocomplete_groups)
@@ -104,34 +104,33 @@ class VoteCommands(app_commands.Group):
         if len(options_list) < 2:
             await interaction.followup.send("You must provide at least two options!", ephemeral=True)
             return
+        # One button per option: Discord allows 25 buttons on a message and 80 characters per label
+        if len(options_list) > MAX_OPTIONS:
+            await interaction.followup.send(f"A vote can have at most {MAX_OPTIONS} options!", ephemeral=True)
+            return
+        if any(len(opt) > MAX_OPTION_LENGTH for opt in options_list):
+            await interaction.followup.send(f"Options can be at most {MAX_OPTION_LENGTH} characters long!", ephemeral=True)
+            return
 
 
-        db = Renfield_SQL()
-        cursor = db.connect()
-
-        print("Start of ID Check")
-        group_id = None
-        if group:
-            print("Group Is there")
-            cursor.execute("SELECT id FROM vote_groups WHERE group_name = %s", (group,))
-            group_data = cursor.fetchone()
-            if group_data:
-                print("Group & ID Exists")
-                group_id = group_data["id"]
-            else:
-                print("Creating Group")
-                cursor.execute("INSERT INTO vote_groups (group_name) VALUES (%s)", (group,))
-                group_id = cursor.lastrowid
-                db.commit()
-
-        print("Inserting into Table")
-        cursor.execute("INSERT INTO votes (creator_id, vote_name, options, group_id) VALUES (%s, %s, %s, %s)",
-                       (interaction.user.id, name, json.dumps(options_list), group_id))
-        print("Inserted Into Table")
-        vote_id = cursor.lastrowid
-        print("Getting votes ID")
-        db.commit()
-        db.disconnect()
+        async with self.db.connection() as conn:
+            group_id = None
+            if group:
+                group_data = await conn.fetchone("SELECT id FROM vote_groups WHERE group_name = %s", (group,))
+                if group_data:
+                    group_id = group_data["id"]
+                else:
+                    logger.info(f"Creating vote group {group}")
+                    group_id = await conn.execute("INSERT INTO vote_groups (group_name) VALUES (%s)", (group,))
+                    self.voting.groups.add(group, group_id)
+
+            vote_id = await conn.execute("INSERT INTO votes (creator_id, vote_name, group_id) VALUES (%s, %s, %s)",
+                                         (interaction.user.id, name, group_id))
+            await conn.executemany("INSERT INTO vote_options (vote_id, option_index, label) VALUES (%s, %s, %s)",
+                                   [(vote_id, index, opt) for index, opt in enumerate(options_list)])
+            logger.info(f"Created vote #{vote_id} {name}")
+            self.voting.ballots.open_vote(vote_id)
+            self.voting.tallies.add_vote(vote_id, name, options_list, interaction.user.id, group_id)
 
         await interaction.followup.send(f"New Vote Created: **{name}**\nGroup: {group if group else 'No Group'}", ephemeral=True)
 
@@ -146,47 +145,33 @@ class VoteCommands(app_commands.Group):
             vote_id (int): ID of the vote to display
         """
         await interaction.response.defer(thinking=True)
+        await self.send_results(interaction, vote_id)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
+    async def send_results(self, interaction: Interaction, vote_id: int):
+        """Send the results of the vote with vote_id as a followup
 
-        cursor.execute("SELECT vote_name, options FROM votes WHERE id = %s", (vote_id,))
-        vote = cursor.fetchone()
+        Args:
+            interaction (Interaction): Discord Interaction Variable, already deferred
+            vote_id (int): ID of the vote to display
+        """
+        # Counts are kept current by the TallyCache, no need to scan votes_users
+        tally = self.voting.tallies.get(vote_id)
 
-        if not vote:
+        if not tally:
             await interaction.followup.send("Vote not found!", ephemeral=True)
-            db.disconnect()
             return
 
-        vote_name = vote["vote_name"]
-        options_json = vote["options"]
-        options = json.loads(options_json)
-
-        cursor.execute("SELECT choice, COUNT(*) as count FROM votes_users WHERE vote_id = %s GROUP BY choice", (vote_id,))
-        vote_results = cursor.fetchall()
-
-        results = {option: 0 for option in options}
-        total_votes = 0
-
-        for value in vote_results:
-            results[value["choice"]] = value["count"]
-            total_votes += value["count"]
-
-        db.disconnect()
-
-        # Find the highest vote count
-        max_votes = max(results.values()) if results else 0
-        winners = [opt for opt, count in results.items() if count == max_votes]
+        winners = tally.winners()
 
         # Format the results with **bold winners**
         result_text = "\n".join(
-            [f"**{opt}**: {'**' if opt in winners else ''}{results[opt]} votes{'**' if opt in winners else ''}" for opt in options]
+            [f"**{opt}**: {'**' if opt in winners else ''}{count} votes{'**' if opt in winners else ''}" for opt, count in tally.results()]
         )
 
         await interaction.followup.send(
-            f"# Vote Results for: {vote_name}\n"
+            f"# Vote Results for: {tally.vote_name}\n"
             f"{result_text}\n\n"
-            f"**Total Votes:** {total_votes}\n"
+            f"**Total Votes:** {tally.total}\n"
             f"## Winner: {winners}",
             ephemeral=True
         )
@@ -202,23 +187,21 @@ class VoteCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
+        vote = self.voting.tallies.get(vote_id)
 
-        cursor.execute("SELECT creator_id FROM votes WHERE id = %s AND is_active = TRUE", (vote_id,))
-        vote = cursor.fetchone()
-
-        if not vote:
+        if not vote or not vote.is_active:
             await interaction.followup.send("Vote not found or already ended!", ephemeral=True)
-        elif vote["creator_id"] != interaction.user.id:
+        elif vote.creator_id != interaction.user.id:
             await interaction.followup.send("Only the creator can end this vote!", ephemeral=True)
         else:
-            cursor.execute("UPDATE votes SET is_active = FALSE WHERE id = %s", (vote_id,))
-            db.commit()
+            # Stop taking ballots and write out the buffered ones before closing the vote
+            await self.voting.ballots.close_vote(vote_id)
+            await self.db.execute("UPDATE votes SET is_active = FALSE WHERE id = %s", (vote_id,))
+            await self.voting.tallies.end(vote_id)
+            await self.voting.live.finish(vote_id)
             await interaction.followup.send(f"Vote #{vote_id} has ended!")
 
-        db.disconnect()
-        await vote_results(self, interaction, vote_id)
+        await self.send_results(interaction, vote_id)
 
     
 
@@ -233,29 +216,20 @@ class VoteCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
-
-        cursor.execute("SELECT vote_name, options, is_active FROM votes WHERE id = %s", (vote_id,))
-        vote = cursor.fetchone()
+        vote = self.voting.tallies.get(vote_id)
 
         if not vote:
             await interaction.followup.send("Vote not found!", ephemeral=True)
-            db.disconnect()
             return
 
-        if not vote["is_active"]:
+        if not vote.is_active:
             await interaction.followup.send("This vote has already ended!", ephemeral=True)
-            db.disconnect()
             return
 
-        vote_name, options_json = vote["vote_name"], vote["options"]
-        options = json.loads(options_json)
-
-        view = VoteButtons(vote_id, options)
-        await interaction.followup.send(f"**Vote:** {vote_name}\nClick below to vote:", view=view)
-
-        db.disconnect()
+        view = self.voting.vote_view(vote)
+        message = await interaction.followup.send(render_vote(vote), view=view, wait=True)
+        # The message then edits itself with the running counts
+        await self.voting.live.track(vote_id, interaction.channel_id, message.id)
     
     @app_commands.command(name="new_group", description="Create a new vote group")
     @role_check()
@@ -268,20 +242,15 @@ class VoteCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
+        async with self.db.connection() as conn:
+            existing_group = await conn.fetchone("SELECT id FROM vote_groups WHERE group_name = %s", (group_name,))
 
-        cursor.execute("SELECT id FROM vote_groups WHERE group_name = %s", (group_name,))
-        existing_group = cursor.fetchone()
-
-        if existing_group:
-            await interaction.followup.send(f"Group **{group_name}** already exists!", ephemeral=True)
-        else:
-            cursor.execute("INSERT INTO vote_groups (group_name) VALUES (%s)", (group_name,))
-            db.commit()
-            await interaction.followup.send(f"Vote group **{group_name}** has been created!", ephemeral=True)
-
-        db.disconnect()
+            if existing_group:
+                await interaction.followup.send(f"Group **{group_name}** already exists!", ephemeral=True)
+            else:
+                group_id = await conn.execute("INSERT INTO vote_groups (group_name) VALUES (%s)", (group_name,))
+                self.voting.groups.add(group_name, group_id)
+                await interaction.followup.send(f"Vote group **{group_name}** has been created!", ephemeral=True)
         
         
     @app_commands.command(name="list_groups", description="List all available vote groups")
@@ -294,13 +263,7 @@ class VoteCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
-
-        cursor.execute("SELECT group_name FROM vote_groups")
-        groups = cursor.fetchall()
-
-        db.disconnect()
+        groups = await self.db.fetchall("SELECT group_name FROM vote_groups")
 
         if not groups:
             await interaction.followup.send("No vote groups found.", ephemeral=True)
@@ -322,36 +285,137 @@ class VoteCommands(app_commands.Group):
         """
         await interaction.response.defer(thinking=True)
 
-        db = Renfield_SQL()
-        cursor = db.connect()
-
-        cursor.execute("SELECT id FROM vote_groups WHERE group_name = %s", (group_name,))
-        group = cursor.fetchone()
-
-        if not group:
+        group_id = self.voting.groups.get(group_name)
+        if group_id is None:
             await interaction.followup.send(f"Group **{group_name}** not found.", ephemeral=True)
-            db.disconnect()
             return
 
-        group_id = group["id"]
-        cursor.execute("SELECT id, vote_name, options FROM votes WHERE group_id = %s", (group_id,))
-        votes = cursor.fetchall()
-
+        votes = self.voting.tallies.in_group(group_id)
         if not votes:
             await interaction.followup.send(f"No votes found in group **{group_name}**.", ephemeral=True)
-            db.disconnect()
             return
 
-        results_text = f"# **Group Results: {group_name}**\n\n"
+        fields = []
         for vote in votes:
-            results_text += f"## {vote['vote_name']}\n"
+            winners = vote.winners() if vote.total else []
+            lines = [
+                f"{'**' if opt in winners else ''}{opt}: {count}{'**' if opt in winners else ''}"
+                for opt, count in vote.results()
+            ]
+            lines.append(f"Total: {vote.total} | Winner: {', '.join(winners) if winners else 'No votes'}")
+            status = "" if vote.is_active else " (ended)"
+            fields.append((f"#{vote.vote_id} {vote.vote_name}{status}", "\n".join(lines)))
+
+        # Large groups (e.g. an AGM) are split over several embeds and messages
+        for embeds in build_embed_pages(f"Group Results: {group_name}", fields):
+            await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+    @app_commands.command(name="export", description="Export the ballots of a vote or a whole group")
+    @role_check()
+    @app_commands.autocomplete(group_name=autocomplete_groups)
+    async def export_votes(self, interaction: Interaction, vote_id: int = None, group_name: str = None, file_format: Literal["csv", "jsonl"] = "csv"):
+        """Send every ballot of a vote, or of all votes in a group, as a compressed attachment
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            vote_id (int, optional): ID of the vote to export. Defaults to None.
+            group_name (str, optional): Name of the group to export. Defaults to None.
+            file_format (Literal["csv", "jsonl"], optional): Format of the file. Defaults to "csv".
+        """
+        await interaction.response.defer(thinking=True, ephemeral=True)
+
+        if (vote_id is None) == (group_name is None):
+            await interaction.followup.send("Give either a vote ID or a group name.", ephemeral=True)
+            return
+
+        if vote_id is not None:
+            if not self.voting.tallies.get(vote_id):
+                await interaction.followup.send("Vote not found!", ephemeral=True)
+                return
+            vote_ids = [vote_id]
+            name = f"vote_{vote_id}"
+        else:
+            group_id = self.voting.groups.get(group_name)
+            if group_id is None:
+                await interaction.followup.send(f"Group **{group_name}** not found.", ephemeral=True)
+                return
+            vote_ids = [vote.vote_id for vote in self.voting.tallies.in_group(group_id)]
+            name = f"group_{group_id}"
+
+        # Ballots still waiting in the buffer belong in the export
+        await self.voting.ballots.flush()
+        path, rows = await export_ballots(self.db, vote_ids, file_format)
+        try:
+            limit = interaction.guild.filesize_limit if interaction.guild else EXPORT_SIZE_LIMIT
+            if os.path.getsize(path) > limit:
+                await interaction.followup.send(f"The export of {rows} ballots is too large to upload, export fewer votes at a time.", ephemeral=True)
+                return
+            await interaction.followup.send(
+                f"{rows} ballots from {len(vote_ids)} vote(s)",
+                file=discord.File(path, filename=f"{name}_ballots.{file_format}.gz"),
+                ephemeral=True,
+            )
+        finally:
+            os.remove(path)
 
-        db.disconnect()
-        await interaction.followup.send(results_text, ephemeral=True)
 class Voting(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bot.tree.add_command(VoteCommands(name="vote"))
+        self.db = bot.db
+        self.groups = GroupIndex()
+        config = bot.config
+        self.ballots = BallotBuffer(self.db, config.ballot_flush_interval, config.ballot_batch_size, config.ballot_spill_file)
+        self.tallies = TallyCache(self.db, config.vote_tally_persist)
+        self.live = LiveVoteMessages(bot, self.db, self.tallies, config.vote_live_update_interval)
+        self.views: dict[int, VoteButtons] = {}
+        self.bot.tree.add_command(VoteCommands(self, name="vote"))
+
+    async def cog_load(self):
+        # Load every group name once so autocomplete never touches the database
+        await self.groups.load(self.db)
+        await self.ballots.load()
+        self.ballots.start()
+        # After ballots.load() so replayed ballots are counted
+        await self.tallies.load()
+
+        # Re-attach handlers for every active vote so old vote messages keep working
+        for tally in self.tallies.active():
+            try:
+                self.vote_view(tally)
+            except Exception as e:
+                # One vote Discord can't show buttons for must not take every vote command down
+                logger.error(f"Could not attach buttons to vote #{tally.vote_id}: {e}", exc_info=True)
+        await self.live.load()
+        self.live.start()
+
+    def vote_view(self, tally: VoteTally):
+        """Get the persistent view for a vote, registering it with the bot on first use
+
+        Args:
+            tally (VoteTally): Vote to build buttons for
+
+        Returns:
+            VoteButtons: View whose buttons handle clicks on any message showing this vote
+        """
+        view = self.views.get(tally.vote_id)
+        if view is None:
+            view = VoteButtons(self, tally.vote_id, tally.options)
+            self.bot.add_view(view)
+            self.views[tally.vote_id] = view
+        return view
+
+    async def cog_unload(self):
+        await self.live.close()
+        # Every confirmed ballot must reach the database before shutdown
+        await self.ballots.close()
+
+    @commands.Cog.listener()
+    async def on_config_reload(self, config):
+        self.ballots.flush_interval = config.ballot_flush_interval
+        self.ballots.batch_size = config.ballot_batch_size
+        self.ballots.spill_file = config.ballot_spill_file
+        self.tallies.persist = config.vote_tally_persist
+        self.live.interval = config.vote_live_update_interval
         
     @commands.Cog.listener()
     async def on_app_command_error(self, interaction: Interaction, error):
@@ -370,19 +434,19 @@ class Voting(commands.Cog):
                     await interaction.followup.send("An error occurred while executing the command.", ephemeral=True)
                 else:
                     await interaction.response.send_message("An error occurred while executing the command.", ephemeral=True)
-                print(f"CommandInvokeError: {error}")
+                logger.error(f"CommandInvokeError: {error}", exc_info=error)
 
             else:
                 if interaction.response.is_done():
                     await interaction.followup.send("An unknown error occurred.", ephemeral=True)
                 else:
                     await interaction.response.send_message("An unknown error occurred.", ephemeral=True)
-                print(f"Unknown Error: {error}")
+                logger.error(f"Unknown Error: {error}", exc_info=error)
 
         except discord.errors.InteractionResponded:
-            print(f"Interaction already responded: {error}")
+            logger.warning(f"Interaction already responded: {error}")
         except Exception as e:  # Fix incorrect exception handling
-            print(f"Error: {e}")
+            logger.error(f"Error: {e}", exc_info=True)
             if not interaction.response.is_done():
                 await interaction.response.send_message("Unexpected error occurred!", ephemeral=True)
 
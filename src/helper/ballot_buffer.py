@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import os
+from enum import Enum
+from helper.renfield_sql import Renfield_Pool
+
+logger = logging.getLogger(__name__)
+
+
+class BallotStatus(Enum):
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"
+    ENDED = "ended"
+
+
+class BallotBuffer:
+    """Write-behind buffer that accepts ballots in memory and batches them into votes_users"""
+
+    def __init__(self, db: Renfield_Pool, flush_interval: float, batch_size: int, spill_file: str):
+        """Create the buffer. Call load() and start() before accepting ballots
+
+        Args:
+            db (Renfield_Pool): Database pool
+            flush_interval (float): Seconds between background flushes
+            batch_size (int): Pending ballots that trigger an early flush
+            spill_file (str): File that holds ballots the database could not take on shutdown
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.spill_file = spill_file
+        self.active: set[int] = set()
+        self._voters: dict[int, set[int]] = {}  # vote_id -> user IDs that have voted
+        self._pending: list[tuple[int, int, int]] = []  # (vote_id, user_id, option_index)
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def load(self):
+        """Load active votes and who has voted in them, then replay any spilled ballots"""
+        votes = await self.db.fetchall("SELECT id FROM votes WHERE is_active = TRUE")
+        self.active = {vote["id"] for vote in votes}
+
+        ballots = await self.db.fetchall(
+            "SELECT vu.vote_id, vu.user_id FROM votes_users vu JOIN votes v ON v.id = vu.vote_id WHERE v.is_active = TRUE"
+        )
+        self._voters = {vote_id: set() for vote_id in self.active}
+        for ballot in ballots:
+            self._voters.setdefault(ballot["vote_id"], set()).add(ballot["user_id"])
+
+        if os.path.exists(self.spill_file):
+            with open(self.spill_file) as spill:
+                spilled = [tuple(json.loads(line)) for line in spill if line.strip()]
+            spilled = await self._spilled_indexes(spilled)
+            for vote_id, user_id, _ in spilled:
+                self._voters.setdefault(vote_id, set()).add(user_id)
+            self._pending.extend(spilled)
+            await self.flush()
+            os.remove(self.spill_file)
+            logger.info(f"Replayed {len(spilled)} spilled ballots")
+
+    async def _spilled_indexes(self, spilled: list[tuple]):
+        """Convert ballots spilled before options had indexes, which hold the option label"""
+        if all(isinstance(choice, int) for _, _, choice in spilled):
+            return spilled
+        rows = await self.db.fetchall("SELECT vote_id, option_index, label FROM vote_options")
+        indexes = {(row["vote_id"], row["label"]): row["option_index"] for row in rows}
+        converted = []
+        for vote_id, user_id, choice in spilled:
+            index = choice if isinstance(choice, int) else indexes.get((vote_id, choice))
+            if index is None:
+                logger.warning(f"Dropping spilled ballot of user {user_id} in vote #{vote_id}: unknown option {choice!r}")
+                continue
+            converted.append((vote_id, user_id, index))
+        return converted
+
+    def start(self):
+        """Start the background flusher"""
+        self._task = asyncio.create_task(self._run())
+
+    def open_vote(self, vote_id: int):
+        """Start accepting ballots for a new vote
+
+        Args:
+            vote_id (int): ID of the vote
+        """
+        self.active.add(vote_id)
+        self._voters.setdefault(vote_id, set())
+
+    async def close_vote(self, vote_id: int):
+        """Stop accepting ballots for a vote and write out everything already accepted
+
+        Args:
+            vote_id (int): ID of the vote
+        """
+        self.active.discard(vote_id)
+        await self.flush()
+        self._voters.pop(vote_id, None)
+
+    def submit(self, vote_id: int, user_id: int, option_index: int):
+        """Accept a ballot. It is written to the database by the next flush
+
+        Args:
+            vote_id (int): ID of the vote
+            user_id (int): Discord ID of the voter
+            option_index (int): Index of the option voted for
+
+        Returns:
+            BallotStatus: Whether the ballot was accepted
+        """
+        if vote_id not in self.active:
+            return BallotStatus.ENDED
+
+        voters = self._voters.setdefault(vote_id, set())
+        if user_id in voters:
+            return BallotStatus.DUPLICATE
+
+        voters.add(user_id)
+        self._pending.append((vote_id, user_id, option_index))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return BallotStatus.ACCEPTED
+
+    async def flush(self):
+        """Write every pending ballot in one multi-row INSERT IGNORE
+
+        Raises:
+            Exception: The write failed. The ballots stay pending for the next flush
+        """
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                async with self.db.connection() as conn:
+                    # pymysql rewrites this into a single multi-row INSERT
+                    await conn.executemany(
+                        "INSERT IGNORE INTO votes_users (vote_id, user_id, option_index) VALUES (%s, %s, %s)",
+                        batch,
+                    )
+            except BaseException:
+                # Also covers cancellation mid-write. Re-sending is safe since the insert ignores duplicates
+                self._pending[:0] = batch
+                raise
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing ballots, {len(self._pending)} still pending: {e}", exc_info=True)
+
+    async def close(self):
+        """Stop the flusher and write out every pending ballot. Ballots the database cannot take are spilled to disk and replayed by the next load()"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing ballots on shutdown, spilling {len(self._pending)} to {self.spill_file}: {e}", exc_info=True)
+            with open(self.spill_file, "a") as spill:
+                for ballot in self._pending:
+                    spill.write(json.dumps(ballot) + "\n")
+            self._pending = []
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+import os
+import discord
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: discord.abc.Snowflake | None = None):
+    """Stable hash of the command definitions Discord would receive for a scope
+
+    Args:
+        tree (app_commands.CommandTree): Command tree
+        guild (discord.abc.Snowflake | None, optional): Guild scope. Defaults to the global commands.
+
+    Returns:
+        str: Hex digest, unchanged as long as the uploaded payload is unchanged
+    """
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)), key=lambda c: (c["name"], c.get("type", 1)))
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CommandSync:
+    """Syncs a command tree only when its definitions changed since the last sync
+
+    The last synced hash per scope is kept in a small JSON file so restarts and gateway
+    reconnects don't re-upload unchanged commands against the sync rate limit.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._hashes: dict[str, str] | None = None
+
+    def _load(self):
+        if self._hashes is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._hashes = json.load(f)
+            except FileNotFoundError:
+                self._hashes = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable command sync state {self.path}: {e}")
+                self._hashes = {}
+        return self._hashes
+
+    def _save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self._hashes, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    async def sync(self, tree: app_commands.CommandTree, guild: discord.abc.Snowflake | None = None, force: bool = False):
+        """Sync one scope if its commands changed
+
+        Args:
+            tree (app_commands.CommandTree): Command tree
+            guild (discord.abc.Snowflake | None, optional): Guild scope. Defaults to the global commands.
+            force (bool, optional): Sync even if nothing changed. Defaults to False.
+
+        Returns:
+            bool: Whether the commands were uploaded
+        """
+        hashes = self._load()
+        # Keyed by application too, so one state file can serve several bot tokens
+        scope = f"{tree.client.application_id}:{'global' if guild is None else f'guild:{guild.id}'}"
+        digest = tree_hash(tree, guild)
+        if not force and hashes.get(scope) == digest:
+            logger.info(f"Commands unchanged for {scope}, skipping sync")
+            return False
+
+        await tree.sync(guild=guild)
+        hashes[scope] = digest
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Could not save command sync state {self.path}: {e}")
+        return True
@@ -0,0 +1,164 @@
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Config:
+    """Every setting the bot reads from the environment, parsed and validated once"""
+
+    # Discord
+    discord_token: str
+    discord_guild_id: int | None
+    required_roles: frozenset[str]
+    default_voice_channel_id: int | None
+    command_sync_file: str
+
+    # Logging and metrics
+    log_home: str | None
+    log_level: str
+    log_rotate_when: str
+    log_max_bytes: int
+    log_backup_count: int
+    metrics_port: int
+
+    # Database
+    database_host: str
+    database_name: str
+    database_username: str
+    database_password: str | None
+    database_pool_size: int
+    database_acquire_timeout: float
+    database_migrate_on_start: bool
+    encryption_key: str | None
+
+    # Voting
+    ballot_flush_interval: float
+    ballot_batch_size: int
+    ballot_spill_file: str
+    vote_tally_persist: bool
+    vote_live_update_interval: float
+
+    # Dice
+    odds_cache_size: int
+    odds_precompute_dice: int
+    dice_history_size: int
+    dice_history_users: int
+    dice_history_flush_interval: float
+
+    # OpenAI
+    gpt_api_url: str | None
+    openai_api_key: str | None
+    openai_model: str
+    openai_system_content: str | None
+    openai_max_concurrency: int
+    openai_timeout: float
+    openai_stream_edit_interval: float
+    ghoul_memory_tokens: int
+    ghoul_memory_ttl: float
+    ghoul_memory_max_tokens: int
+    ghoul_cache_size: int
+    ghoul_cache_ttl: float
+
+    @classmethod
+    def from_env(cls, env_file: str | None = None):
+        """Load the .env file and build the configuration from the environment
+
+        Args:
+            env_file (str | None, optional): Path of the .env file. Defaults to searching from the working directory.
+
+        Raises:
+            ValueError: One or more settings are missing or invalid. Every problem is listed
+
+        Returns:
+            Config: The validated configuration
+        """
+        # override=True so a reload picks up edits to the file
+        load_dotenv(env_file, override=True)
+        errors = []
+
+        def text(name: str, default: str | None = None, required: bool = False):
+            value = os.getenv(name, "").strip() or default
+            if required and not value:
+                errors.append(f"{name} is required")
+            return value
+
+        def number(name: str, kind: type, default, minimum=None):
+            raw = text(name)
+            if raw is None:
+                return default
+            try:
+                value = kind(raw)
+            except ValueError:
+                errors.append(f"{name} must be a {kind.__name__}, got {raw!r}")
+                return default
+            if minimum is not None and value < minimum:
+                errors.append(f"{name} must be at least {minimum}, got {value}")
+            return value
+
+        def flag(name: str, default: bool):
+            raw = text(name)
+            if raw is None:
+                return default
+            if raw.lower() not in ("true", "false", "1", "0", "yes", "no"):
+                errors.append(f"{name} must be true or false, got {raw!r}")
+                return default
+            return raw.lower() in ("true", "1", "yes")
+
+        config = cls(
+            discord_token=text("DISCORD_TOKEN", required=True),
+            discord_guild_id=number("DISCORD_GUILD_ID", int, None),
+            required_roles=frozenset(role.strip() for role in text("REQUIRED_ROLES", "").split(",") if role.strip()),
+            default_voice_channel_id=number("DEFAULT_VOICE_CHANNEL_ID", int, None),
+            command_sync_file=text("COMMAND_SYNC_FILE", "command_sync.json"),
+            log_home=text("LOG_HOME"),
+            log_level=text("LOG_LEVEL", "INFO").upper(),
+            log_rotate_when=text("LOG_ROTATE_WHEN", "size").lower(),
+            log_max_bytes=number("LOG_MAX_BYTES", int, 10 * 1024 * 1024, minimum=1024),
+            log_backup_count=number("LOG_BACKUP_COUNT", int, 10, minimum=0),
+            metrics_port=number("METRICS_PORT", int, 9100, minimum=0),
+            database_host=text("DATABASE_HOST", "localhost"),
+            database_name=text("DATABASE_NAME", "renfield"),
+            database_username=text("DATABASE_USERNAME", required=True),
+            database_password=text("DATABASE_PASSWORD"),
+            database_pool_size=number("DATABASE_POOL_SIZE", int, 5, minimum=1),
+            database_acquire_timeout=number("DATABASE_ACQUIRE_TIMEOUT", float, 10.0, minimum=0),
+            database_migrate_on_start=flag("DATABASE_MIGRATE_ON_START", True),
+            encryption_key=text("ENCRYPTION_KEY"),
+            ballot_flush_interval=number("BALLOT_FLUSH_INTERVAL", float, 1.0, minimum=0.05),
+            ballot_batch_size=number("BALLOT_BATCH_SIZE", int, 500, minimum=1),
+            ballot_spill_file=text("BALLOT_SPILL_FILE", "pending_ballots.jsonl"),
+            vote_tally_persist=flag("VOTE_TALLY_PERSIST", True),
+            vote_live_update_interval=number("VOTE_LIVE_UPDATE_INTERVAL", float, 3.0, minimum=1.0),
+            odds_cache_size=number("ODDS_CACHE_SIZE", int, 4096, minimum=1),
+            odds_precompute_dice=number("ODDS_PRECOMPUTE_DICE", int, 15, minimum=0),
+            dice_history_size=number("DICE_HISTORY_SIZE", int, 50, minimum=1),
+            dice_history_users=number("DICE_HISTORY_USERS", int, 2000, minimum=1),
+            dice_history_flush_interval=number("DICE_HISTORY_FLUSH_INTERVAL", float, 5.0, minimum=0.1),
+            gpt_api_url=text("GPT_API_URL"),
+            openai_api_key=text("OPENAI_API_KEY"),
+            openai_model=text("OPENAI_MODEL", "gpt-4o-mini"),
+            openai_system_content=text("OPENAI_SYSTEM_CONTENT"),
+            openai_max_concurrency=number("OPENAI_MAX_CONCURRENCY", int, 4, minimum=1),
+            openai_timeout=number("OPENAI_TIMEOUT", float, 30.0, minimum=1),
+            openai_stream_edit_interval=number("OPENAI_STREAM_EDIT_INTERVAL", float, 1.0, minimum=0.2),
+            ghoul_memory_tokens=number("GHOUL_MEMORY_TOKENS", int, 2000, minimum=0),
+            ghoul_memory_ttl=number("GHOUL_MEMORY_TTL", float, 1800.0, minimum=0),
+            ghoul_memory_max_tokens=number("GHOUL_MEMORY_MAX_TOKENS", int, 1_000_000, minimum=0),
+            ghoul_cache_size=number("GHOUL_CACHE_SIZE", int, 512, minimum=0),
+            ghoul_cache_ttl=number("GHOUL_CACHE_TTL", float, 3600.0, minimum=0),
+        )
+
+        if config.log_level not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            errors.append(f"LOG_LEVEL must be DEBUG, INFO, WARNING, ERROR or CRITICAL, got {config.log_level!r}")
+        if config.log_rotate_when not in ("size", "s", "m", "h", "d", "midnight") and not (
+            len(config.log_rotate_when) == 2 and config.log_rotate_when[0] == "w" and config.log_rotate_when[1] in "0123456"
+        ):
+            errors.append(f"LOG_ROTATE_WHEN must be size, S, M, H, D, midnight or W0-W6, got {config.log_rotate_when!r}")
+
+        if not config.required_roles:
+            errors.append("REQUIRED_ROLES must name at least one role")
+
+        if errors:
+            raise ValueError("Invalid configuration: " + "; ".join(errors))
+        return config
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def split_difficulty(difficulty: int):
+    """Split a difficulty into the target number and the penalty for going above 10
+
+    Args:
+        difficulty (int): Requested difficulty
+
+    Returns:
+        tuple[int, int]: Target number (at most 10) and successes removed as a penalty
+    """
+    return min(difficulty, 10), max(0, difficulty - 10)
+
+
+class DiceEngine:
+    """Batched V20 dice roller backed by a NumPy generator"""
+
+    def __init__(self, seed: int | None = None):
+        """Create the engine
+
+        Args:
+            seed (int | None, optional): Seed for reproducible rolls. Defaults to None.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def roll(self, pools: int, dice: int):
+        """Roll several pools of the same size at once
+
+        Args:
+            pools (int): Number of pools
+            dice (int): Dice in each pool
+
+        Returns:
+            np.ndarray: Faces, shape (pools, dice), values 1-10
+        """
+        return self.rng.integers(1, 11, size=(pools, dice), dtype=np.int8)
+
+    @staticmethod
+    def successes(rolls: np.ndarray, difficulty: int, speciality: bool, mask: np.ndarray | None = None):
+        """Count net successes for each pool: 1s cancel a success, speciality 10s count double
+
+        Args:
+            rolls (np.ndarray): Faces, shape (pools, dice)
+            difficulty (int): Difficulty, above 10 removes a success per point
+            speciality (bool): Whether a speciality is applied
+            mask (np.ndarray | None, optional): Which dice are part of each pool, for pools of mixed size. Defaults to None.
+
+        Returns:
+            np.ndarray: Net successes per pool
+        """
+        target, penalty = split_difficulty(difficulty)
+
+        hits = rolls >= target
+        score = hits.astype(np.int16)
+        if speciality:
+            score += hits & (rolls == 10)
+        score -= rolls == 1
+
+        if mask is not None:
+            score *= mask
+        return score.sum(axis=1) - penalty
+
+    def roll_pools(self, sizes: list[int], difficulty: int, speciality: bool):
+        """Roll many pools, possibly of different sizes, in one batch
+
+        Args:
+            sizes (list[int]): Dice in each pool
+            difficulty (int): Difficulty for every pool
+            speciality (bool): Whether a speciality is applied
+
+        Returns:
+            tuple[list[list[int]], list[int]]: Faces and net successes for each pool
+        """
+        sizes = np.asarray(sizes)
+        rolls = self.roll(len(sizes), int(sizes.max()))
+        mask = np.arange(rolls.shape[1]) < sizes[:, None]
+        successes = self.successes(rolls, difficulty, speciality, mask)
+
+        faces = [row[:size].tolist() for row, size in zip(rolls, sizes)]
+        return faces, successes.tolist()
@@ -0,0 +1,111 @@
+from fractions import Fraction
+from functools import lru_cache
+from helper.dice_engine import split_difficulty
+
+
+def _face_scores(target: int, speciality: bool):
+    """Ways a single d10 scores -1, 0, +1 and +2 net successes, same rules as DiceEngine.successes"""
+    counts = [0, 0, 0, 0]
+    for face in range(1, 11):
+        score = 0
+        if face >= target:
+            score += 2 if face == 10 and speciality else 1
+        if face == 1:
+            score -= 1
+        counts[score + 1] += 1
+    return counts
+
+
+def _compute_distribution(dice: int, target: int, speciality: bool):
+    """Number of the 10**dice outcomes giving each net success count, from -dice upwards
+
+    Each die is the polynomial x**-1 + ... over its face scores; the pool is that polynomial
+    raised to the number of dice, built by convolving one die at a time onto the cached smaller pool.
+    """
+    if dice == 0:
+        return (1,)
+
+    previous = _distribution(dice - 1, target, speciality)
+    face = _face_scores(target, speciality)
+    result = [0] * (len(previous) + len(face) - 1)
+    for i, ways in enumerate(previous):
+        if ways:
+            for j, face_ways in enumerate(face):
+                result[i + j] += ways * face_ways
+    return tuple(result)
+
+
+def set_cache_size(size: int):
+    """Bound the number of pool distributions kept in memory. Clears the cache
+
+    Args:
+        size (int): Maximum cached distributions
+    """
+    global _distribution
+    # The recursion looks _distribution up by name, so smaller pools go through the cache too
+    _distribution = lru_cache(maxsize=size)(_compute_distribution)
+
+
+_distribution = lru_cache(maxsize=4096)(_compute_distribution)
+
+
+class DiceOdds:
+    """Exact outcome probabilities for one pool"""
+
+    def __init__(self, dice: int, difficulty: int, speciality: bool):
+        target, penalty = split_difficulty(difficulty)
+        self.dice = dice
+        self.target = target
+        self.penalty = penalty
+        self.speciality = speciality
+
+        total = 10 ** dice
+        lowest = -dice - penalty
+        self.distribution = {
+            lowest + offset: Fraction(ways, total)
+            for offset, ways in enumerate(_distribution(dice, target, speciality))
+            if ways
+        }
+
+        # A botch is no die reaching the target and at least one 1
+        if target <= 1:
+            self.botch = Fraction(0)
+        else:
+            self.botch = Fraction((target - 1) ** dice - (target - 2) ** dice, total)
+
+    def at_least(self, successes: int):
+        """Probability of at least this many net successes
+
+        Args:
+            successes (int): Net successes
+
+        Returns:
+            Fraction: Probability
+        """
+        return sum((p for net, p in self.distribution.items() if net >= successes), Fraction(0))
+
+
+def odds(dice: int, difficulty: int, speciality: bool):
+    """Exact odds for a pool, following the same rules as /diceroller roll
+
+    Args:
+        dice (int): Number of dice
+        difficulty (int): Difficulty, above 10 removes a success per point
+        speciality (bool): Whether a speciality is applied
+
+    Returns:
+        DiceOdds: Distribution of net successes and botch chance
+    """
+    return DiceOdds(dice, difficulty, speciality)
+
+
+def precompute(max_dice: int):
+    """Fill the cache for every difficulty and pool size up to max_dice
+
+    Args:
+        max_dice (int): Largest pool to precompute
+    """
+    for target in range(2, 11):
+        for speciality in (False, True):
+            # Computing the largest pool caches every smaller one on the way
+            _distribution(max_dice, target, speciality)
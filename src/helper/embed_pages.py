@@ -0,0 +1,124 @@
+import discord
+
+# Discord message limits
+EMBED_TOTAL_LIMIT = 6000  # Characters across every embed in one message
+EMBED_FIELD_LIMIT = 25
+EMBEDS_PER_MESSAGE = 10
+TITLE_LIMIT = 256
+PAGE_SUFFIX_LIMIT = 16  # Room kept in the title for " (n/m)"
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+
+
+def _truncate(text: str, limit: int):
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def build_embed_pages(title: str, fields: list[tuple[str, str]], color: discord.Color = discord.Color.blue(), per_embed: int = EMBED_FIELD_LIMIT):
+    """Split fields over as many embeds and messages as Discord's size limits require
+
+    Args:
+        title (str): Title of every embed, numbered when there is more than one
+        fields (list[tuple[str, str]]): Field names and values, in display order
+        color (discord.Color, optional): Embed colour. Defaults to discord.Color.blue().
+        per_embed (int, optional): Most fields in one embed. Defaults to Discord's limit of 25.
+
+    Returns:
+        list[list[discord.Embed]]: Embeds grouped into messages
+    """
+    # Numbered titles are cut shorter so the suffix always fits
+    numbered_title = _truncate(title, TITLE_LIMIT - PAGE_SUFFIX_LIMIT)
+    fields = [(_truncate(name, FIELD_NAME_LIMIT), _truncate(value, FIELD_VALUE_LIMIT)) for name, value in fields]
+
+    # Pack fields into embeds, leaving room for the page suffix in the title
+    pages: list[list[tuple[str, str]]] = [[]]
+    size = len(numbered_title) + PAGE_SUFFIX_LIMIT
+    for name, value in fields:
+        field_size = len(name) + len(value)
+        if pages[-1] and (len(pages[-1]) >= min(per_embed, EMBED_FIELD_LIMIT) or size + field_size > EMBED_TOTAL_LIMIT):
+            pages.append([])
+            size = len(numbered_title) + PAGE_SUFFIX_LIMIT
+        pages[-1].append((name, value))
+        size += field_size
+
+    embeds = []
+    for number, page in enumerate(pages, start=1):
+        page_title = _truncate(title, TITLE_LIMIT) if len(pages) == 1 else f"{numbered_title} ({number}/{len(pages)})"
+        embed = discord.Embed(title=page_title, color=color)
+        for name, value in page:
+            embed.add_field(name=name, value=value, inline=False)
+        embeds.append(embed)
+
+    # Pack embeds into messages under the per-message character total
+    messages: list[list[discord.Embed]] = [[]]
+    size = 0
+    for embed in embeds:
+        if messages[-1] and (len(messages[-1]) >= EMBEDS_PER_MESSAGE or size + len(embed) > EMBED_TOTAL_LIMIT):
+            messages.append([])
+            size = 0
+        messages[-1].append(embed)
+        size += len(embed)
+
+    return messages
+
+
+class EmbedPaginator(discord.ui.View):
+    """One embed at a time with previous/next buttons, for the user who ran the command"""
+
+    def __init__(self, embeds: list[discord.Embed], owner_id: int, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.embeds = embeds
+        self.owner_id = owner_id
+        self.page = 0
+        self.message: discord.Message | None = None
+        self._refresh()
+
+    def _refresh(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= len(self.embeds) - 1
+        self.counter.label = f"{self.page + 1}/{len(self.embeds)}"
+
+    async def send(self, interaction: discord.Interaction, **kwargs):
+        """Send the first page as a followup, without buttons if there is only one
+
+        Args:
+            interaction (discord.Interaction): Discord Interaction Variable, already deferred
+        """
+        if len(self.embeds) == 1:
+            await interaction.followup.send(embed=self.embeds[0], **kwargs)
+            self.stop()
+            return
+        self.message = await interaction.followup.send(embed=self.embeds[0], view=self, **kwargs)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Run the command yourself to browse these pages.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = page
+        self._refresh()
+        await interaction.response.edit_message(embed=self.embeds[page], view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def counter(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
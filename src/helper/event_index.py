@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+import discord
+
+
+class EventIndex:
+    """Scheduled events of every guild, kept current from gateway events and sorted by start time"""
+
+    def __init__(self):
+        self._events: dict[int, dict[int, discord.ScheduledEvent]] = {}  # guild id -> event id -> event
+        self._order: dict[int, list[tuple[datetime, int]]] = {}  # guild id -> sorted (start time, event id)
+        # guild id -> event id -> start time the event is sorted under. discord.py updates cached
+        # events in place, so the event itself no longer knows its old start time
+        self._starts: dict[int, dict[int, datetime]] = {}
+
+    def load(self, guild: discord.Guild):
+        """Replace a guild's entries with its cached scheduled events
+
+        Args:
+            guild (discord.Guild): Guild to index
+        """
+        self._events[guild.id] = {event.id: event for event in guild.scheduled_events}
+        self._order[guild.id] = sorted((event.start_time, event.id) for event in guild.scheduled_events)
+        self._starts[guild.id] = {event.id: event.start_time for event in guild.scheduled_events}
+
+    def drop(self, guild_id: int):
+        """Forget a guild, e.g. after the bot leaves it
+
+        Args:
+            guild_id (int): ID of the guild
+        """
+        self._events.pop(guild_id, None)
+        self._order.pop(guild_id, None)
+        self._starts.pop(guild_id, None)
+
+    def add(self, event: discord.ScheduledEvent):
+        """Add or replace an event
+
+        Args:
+            event (discord.ScheduledEvent): Created or updated event
+        """
+        self.remove(event)
+        self._events.setdefault(event.guild_id, {})[event.id] = event
+        insort(self._order.setdefault(event.guild_id, []), (event.start_time, event.id))
+        self._starts.setdefault(event.guild_id, {})[event.id] = event.start_time
+
+    def remove(self, event: discord.ScheduledEvent):
+        """Remove an event if it is indexed
+
+        Args:
+            event (discord.ScheduledEvent): Deleted event
+        """
+        self._events.get(event.guild_id, {}).pop(event.id, None)
+        start = self._starts.get(event.guild_id, {}).pop(event.id, None)
+        if start is None:
+            return
+        # Locate the entry by the start time it was indexed under, which an update may have changed
+        order = self._order[event.guild_id]
+        index = bisect_left(order, (start, event.id))
+        if index < len(order) and order[index][1] == event.id:
+            del order[index]
+
+    def get(self, guild_id: int, event_id: int):
+        """Look up an event by ID
+
+        Args:
+            guild_id (int): ID of the guild
+            event_id (int): ID of the event
+
+        Returns:
+            discord.ScheduledEvent | None: The event, or None if it is not indexed
+        """
+        return self._events.get(guild_id, {}).get(event_id)
+
+    def between(self, guild_id: int, start: datetime | None = None, end: datetime | None = None):
+        """Events of a guild starting within a time range, in start time order
+
+        Args:
+            guild_id (int): ID of the guild
+            start (datetime | None, optional): Earliest start time, inclusive. Defaults to no lower bound.
+            end (datetime | None, optional): Latest start time, inclusive. Defaults to no upper bound.
+
+        Returns:
+            list[discord.ScheduledEvent]: Matching events
+        """
+        order = self._order.get(guild_id, [])
+        events = self._events.get(guild_id, {})
+        low = 0 if start is None else bisect_left(order, (start,))
+        # (end, inf) sorts after every entry starting exactly at end
+        high = len(order) if end is None else bisect_right(order, (end, float("inf")))
+        return [events[event_id] for _, event_id in order[low:high]]
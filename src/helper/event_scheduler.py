@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows at most 100 scheduled events per guild
+MAX_BATCH = 100
+
+
+def parse_time(text: str):
+    """Parse a UTC time given as YYYY-MM-DD HH:MM or YYYY-MM-DD
+
+    Args:
+        text (str): Time typed by the user
+
+    Raises:
+        ValueError: The text is in neither format
+
+    Returns:
+        datetime: The time, timezone aware
+    """
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text.strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid time {text!r}")
+
+
+async def resolve_channel(guild: discord.Guild, channel_id: int | None):
+    """Find a channel in the guild cache, only asking the API when it is missing
+
+    Args:
+        guild (discord.Guild): Guild owning the channel
+        channel_id (int | None): ID of the channel
+
+    Returns:
+        discord.abc.GuildChannel | None: The channel, or None if it does not exist
+    """
+    if channel_id is None:
+        return None
+    channel = guild.get_channel(channel_id)
+    if channel is not None:
+        return channel
+    try:
+        return await guild.fetch_channel(channel_id)
+    except (discord.NotFound, discord.Forbidden):
+        return None
+
+
+@dataclass
+class EventSpec:
+    """One scheduled event to create"""
+
+    name: str
+    description: str
+    start_time: datetime
+    end_time: datetime
+    location: str = "Discord"
+
+    def params(self, channel):
+        """Keyword arguments for guild.create_scheduled_event
+
+        Args:
+            channel (discord.abc.GuildChannel | None): Voice channel, used when the location is Discord
+
+        Returns:
+            dict: The event parameters
+        """
+        params = {
+            "name": self.name,
+            "description": self.description,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "entity_type": discord.EntityType.external if self.location != "Discord" else discord.EntityType.voice,
+            "privacy_level": discord.PrivacyLevel.guild_only,
+        }
+        if self.location != "Discord":
+            params["location"] = self.location
+        else:
+            params["channel"] = channel
+        return params
+
+
+def series(name: str, description: str, start: datetime, duration: int, occurrences: int, interval_days: int, location: str = "Discord"):
+    """Specs for a recurring event
+
+    Args:
+        name (str): Event Name
+        description (str): Event Description
+        start (datetime): Start of the first occurrence
+        duration (int): Duration of each occurrence (Minutes)
+        occurrences (int): Number of occurrences
+        interval_days (int): Days between occurrences
+        location (str, optional): Location, or Discord for the default voice channel. Defaults to "Discord".
+
+    Returns:
+        list[EventSpec]: One spec per occurrence
+    """
+    return [
+        EventSpec(name, description, start + timedelta(days=interval_days * n),
+                  start + timedelta(days=interval_days * n, minutes=duration), location)
+        for n in range(occurrences)
+    ]
+
+
+def parse_events(text: str):
+    """Parse an event list, one event per line (or separated by ;) as
+    `YYYY-MM-DD HH:MM | duration minutes | name | description | location`
+
+    Description and location are optional. Blank lines and lines starting with # are skipped.
+
+    Args:
+        text (str): Pasted or uploaded event list
+
+    Returns:
+        tuple[list[EventSpec], list[str]]: Parsed events, and one message per invalid line
+    """
+    specs, errors = [], []
+    entries = [entry.strip() for line in text.splitlines() for entry in line.split(";")]
+    for number, entry in enumerate(entries, start=1):
+        if not entry or entry.startswith("#"):
+            continue
+        parts = [part.strip() for part in entry.split("|")]
+        if len(parts) < 3 or not parts[2]:
+            errors.append(f"Entry {number}: expected `start | duration | name [| description | location]`")
+            continue
+        try:
+            start = parse_time(parts[0])
+        except ValueError:
+            errors.append(f"Entry {number}: invalid start time {parts[0]!r}")
+            continue
+        if not parts[1].isdigit() or int(parts[1]) < 1:
+            errors.append(f"Entry {number}: duration must be a number of minutes, got {parts[1]!r}")
+            continue
+        description = parts[3] if len(parts) > 3 else ""
+        location = parts[4] if len(parts) > 4 and parts[4] else "Discord"
+        specs.append(EventSpec(parts[2], description, start, start + timedelta(minutes=int(parts[1])), location))
+    return specs, errors
+
+
+class EventBatch:
+    """Events queued by one command, and the message that reports their progress"""
+
+    def __init__(self, guild: discord.Guild, specs: list[EventSpec], channel, message: discord.Message | None):
+        self.guild = guild
+        self.specs = specs
+        self.channel = channel
+        self.message = message
+        self.created = 0
+        self.failures: list[str] = []
+
+    def status(self, done: bool = False):
+        text = f"{'Scheduled' if done else 'Scheduling'} events: {self.created}/{len(self.specs)} created"
+        if self.failures:
+            text += f", {len(self.failures)} failed\n" + "\n".join(self.failures[:10])
+        return text
+
+
+class EventScheduler:
+    """Creates queued events one at a time in the background
+
+    Event creation shares one rate limit bucket per guild; working through a single queue
+    keeps bulk imports from starving other commands of that bucket.
+    """
+
+    def __init__(self, progress_interval: float = 2.0):
+        self.progress_interval = progress_interval
+        self._queue: asyncio.Queue[EventBatch] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, batch: EventBatch):
+        """Queue a batch for creation
+
+        Args:
+            batch (EventBatch): Events to create
+
+        Returns:
+            int: Number of batches ahead of this one
+        """
+        ahead = self._queue.qsize()
+        self._queue.put_nowait(batch)
+        return ahead
+
+    async def _report(self, batch: EventBatch, done: bool = False):
+        if batch.message is None:
+            return
+        try:
+            await batch.message.edit(content=batch.status(done))
+        except discord.HTTPException as e:
+            # The interaction token expires after 15 minutes; the events are still created
+            logger.warning(f"Could not update event schedule progress: {e}")
+            batch.message = None
+
+    async def _create(self, batch: EventBatch, spec: EventSpec):
+        while True:
+            try:
+                await batch.guild.create_scheduled_event(**spec.params(batch.channel))
+                batch.created += 1
+                return
+            except discord.RateLimited as e:
+                # Raised instead of waiting when the bucket is exhausted for longer than the client allows
+                logger.info(f"Event creation rate limited, retrying in {e.retry_after:.1f}s")
+                await asyncio.sleep(e.retry_after)
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to create event {spec.name}: {e}")
+                batch.failures.append(f"{spec.name} ({spec.start_time:%Y-%m-%d %H:%M}): {e.text or e.status}")
+                return
+
+    async def _run(self):
+        while True:
+            batch = await self._queue.get()
+            try:
+                reported = time.monotonic()
+                for spec in batch.specs:
+                    await self._create(batch, spec)
+                    if time.monotonic() - reported >= self.progress_interval:
+                        await self._report(batch)
+                        reported = time.monotonic()
+                await self._report(batch, done=True)
+                logger.info(f"Scheduled {batch.created}/{len(batch.specs)} events in guild {batch.guild.id}")
+            except Exception:
+                logger.exception("Event schedule batch failed")
+            finally:
+                self._queue.task_done()
+
+    async def close(self):
+        """Stop the worker. Batches still queued are dropped"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,180 @@
+import time
+from collections import OrderedDict, deque
+
+
+def estimate_tokens(text: str):
+    """Rough token count of a chat message, about four characters per token plus message overhead
+
+    Args:
+        text (str): Message content
+
+    Returns:
+        int: Estimated tokens
+    """
+    return len(text) // 4 + 4
+
+
+def normalize_prompt(text: str):
+    """Case and whitespace insensitive form of a prompt, for exact-match caching
+
+    Args:
+        text (str): Prompt as typed
+
+    Returns:
+        str: Normalised prompt
+    """
+    return " ".join(text.casefold().split())
+
+
+class Conversation:
+    """Recent turns of one user in one channel"""
+
+    def __init__(self):
+        self.turns: deque[tuple[dict, dict, int]] = deque()  # (user message, reply, tokens)
+        self.tokens = 0
+        self.last_used = time.monotonic()
+
+
+class ConversationStore:
+    """Per user and channel chat history, bounded per conversation and overall
+
+    Each conversation keeps its newest turns within a token budget. Conversations idle for
+    longer than the TTL are dropped, and the least recently used ones are evicted while the
+    store holds more than its total token cap.
+    """
+
+    def __init__(self, token_budget: int, ttl: float, max_total_tokens: int):
+        self.token_budget = token_budget
+        self.ttl = ttl
+        self.max_total_tokens = max_total_tokens
+        self.total_tokens = 0
+        self._conversations: OrderedDict[tuple[int, int], Conversation] = OrderedDict()
+
+    def __len__(self):
+        return len(self._conversations)
+
+    def _drop(self, key: tuple[int, int]):
+        conversation = self._conversations.pop(key, None)
+        if conversation is not None:
+            self.total_tokens -= conversation.tokens
+
+    def _expire(self):
+        # Oldest first, so stop at the first conversation still inside the TTL
+        cutoff = time.monotonic() - self.ttl
+        while self._conversations:
+            key, conversation = next(iter(self._conversations.items()))
+            if conversation.last_used > cutoff:
+                break
+            self._drop(key)
+
+    def history(self, user_id: int, channel_id: int):
+        """Earlier turns of a conversation as chat messages, oldest first
+
+        Args:
+            user_id (int): ID of the user
+            channel_id (int): ID of the channel
+
+        Returns:
+            list[dict]: Messages to send before the new prompt, empty for a new conversation
+        """
+        self._expire()
+        conversation = self._conversations.get((user_id, channel_id))
+        if conversation is None:
+            return []
+        return [message for user, reply, _ in conversation.turns for message in (user, reply)]
+
+    def add(self, user_id: int, channel_id: int, prompt: str, reply: str):
+        """Record a completed turn, trimming the oldest turns to stay within the budgets
+
+        Args:
+            user_id (int): ID of the user
+            channel_id (int): ID of the channel
+            prompt (str): The user's message
+            reply (str): The Model's reply
+        """
+        if not reply.strip():
+            return
+        key = (user_id, channel_id)
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            conversation = self._conversations[key] = Conversation()
+        self._conversations.move_to_end(key)
+        conversation.last_used = time.monotonic()
+
+        tokens = estimate_tokens(prompt) + estimate_tokens(reply)
+        conversation.turns.append(({"role": "user", "content": prompt}, {"role": "assistant", "content": reply}, tokens))
+        conversation.tokens += tokens
+        self.total_tokens += tokens
+
+        while conversation.tokens > self.token_budget and conversation.turns:
+            _, _, old = conversation.turns.popleft()
+            conversation.tokens -= old
+            self.total_tokens -= old
+        if not conversation.turns:
+            self._drop(key)
+
+        while self.total_tokens > self.max_total_tokens and self._conversations:
+            self._drop(next(iter(self._conversations)))
+
+    def forget(self, user_id: int, channel_id: int):
+        """Drop a conversation
+
+        Args:
+            user_id (int): ID of the user
+            channel_id (int): ID of the channel
+        """
+        self._drop((user_id, channel_id))
+
+
+class ResponseCache:
+    """Replies to first messages, keyed on persona and normalised prompt, LRU with a TTL
+
+    The default persona names the user, so replies are only shared between users when
+    OPENAI_SYSTEM_CONTENT sets a fixed persona.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()  # key -> (reply, expiry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, persona: str, prompt: str):
+        """Look up a cached reply
+
+        Args:
+            persona (str): System prompt the reply was generated under
+            prompt (str): The user's message
+
+        Returns:
+            str | None: The cached reply, or None on a miss
+        """
+        key = (persona, normalize_prompt(prompt))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        reply, expiry = entry
+        if expiry < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return reply
+
+    def put(self, persona: str, prompt: str, reply: str):
+        """Cache a reply, evicting the least recently used entries over the size limit
+
+        Args:
+            persona (str): System prompt the reply was generated under
+            prompt (str): The user's message
+            reply (str): The Model's reply
+        """
+        # An empty reply would be served as a hit that shows nothing
+        if self.max_entries <= 0 or not reply.strip():
+            return
+        key = (persona, normalize_prompt(prompt))
+        self._entries[key] = (reply, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,33 +1,153 @@
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
+import asyncio
+import importlib
+import time
+from typing import AsyncIterator
 from discord import Interaction
+from helper.config import Config
+from helper.metrics import metrics
 
-def gpt_response(message : str, interaction:Interaction, content: str | None):
-    """Sends a message to the OpenAI server and gets a response from a Model
-
-    Args:
-        message (str): Message to be sent to the GPT Model
-        interaction (Interaction): Discord Interaction Variable
-        content (str | None): Custom content for the GPT Model to use to set context
-    """
-    load_dotenv()
-    MODEL = os.getenv("OPENAI_MODEL")
-    
-    if content is None:
-        content = f"You are Renfield, the Vampire Ghoul. You serve {interaction.user.name}"
-    
-    client = OpenAI()
-    completion = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": content},
+
+class GPT_Connection:
+    """Long-lived OpenAI client shared by every ghoul command"""
+
+    def __init__(self, config: Config):
+        """Set up the connection. The client is created on first use and its HTTP connections are kept alive between requests
+
+        Args:
+            config (Config): Bot configuration. OPENAI_MAX_CONCURRENCY caps requests in flight,
+                OPENAI_TIMEOUT bounds each request including time spent queued
+        """
+        self.configure(config)
+        self._api_key = config.openai_api_key
+        self._base_url = config.gpt_api_url
+        self._max_concurrency = config.openai_max_concurrency
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._client = None
+
+    async def _get_client(self):
+        """The AsyncOpenAI client, created on first use
+
+        openai (and pydantic with it) is slow to import, so it is only loaded once someone talks
+        to the ghoul, and in a worker thread so the event loop keeps running meanwhile
+        """
+        if self._client is None:
+            openai = await asyncio.to_thread(importlib.import_module, "openai")
+            import httpx
+
+            if self._client is not None:  # Created by a concurrent first request
+                return self._client
+            self._client = openai.AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                timeout=self.timeout,
+                max_retries=1,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self._max_concurrency, max_keepalive_connections=self._max_concurrency),
+                ),
+            )
+        return self._client
+
+    def configure(self, config: Config):
+        """Apply settings that can change on a config reload. Concurrency, API key and URL need a restart
+
+        Args:
+            config (Config): Bot configuration
+        """
+        self.model = config.openai_model
+        self.timeout = config.openai_timeout
+        self.system_content = config.openai_system_content
+
+    def persona(self, interaction: Interaction, content: str | None = None):
+        """System prompt a request will be sent with
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            content (str | None, optional): Custom content for the GPT Model to use to set context. Defaults to None.
+
+        Returns:
+            str: The system prompt
+        """
+        if content is None:
+            content = self.system_content
+        if content is None:
+            content = f"You are Renfield, the Vampire Ghoul. You serve {interaction.user.name}"
+        return content
+
+    def _messages(self, message: str, interaction: Interaction, content: str | None, history: list[dict] | None):
+        return [
+            {"role": "system", "content": self.persona(interaction, content)},
+            *(history or []),
             {
                 "role": "user",
-                "content":message
+                "content": message
             }
-        ],
-       
-    )
+        ]
+
+    async def stream(self, message: str, interaction: Interaction, content: str | None, history: list[dict] | None = None) -> AsyncIterator[str]:
+        """Sends a message to the OpenAI server and yields the Model's reply as it is generated
+
+        Use with contextlib.aclosing so the request is released if the caller stops early.
+
+        Args:
+            message (str): Message to be sent to the GPT Model
+            interaction (Interaction): Discord Interaction Variable
+            content (str | None): Custom content for the GPT Model to use to set context
+            history (list[dict] | None, optional): Earlier messages of the conversation, oldest first. Defaults to None.
+
+        Raises:
+            asyncio.TimeoutError: Waited longer than the configured timeout for a free request slot or the next piece of the reply
+
+        Yields:
+            str: Pieces of the reply, in order
+        """
+        messages = self._messages(message, interaction, content, history)
+
+        started = time.perf_counter()
+        outcome = "error"
+        first = True
+        try:
+            # Queued requests give up after the timeout too, rather than waiting behind slow streams
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+            # Counted once a slot is held, so queued requests are not reported as in flight
+            metrics.gpt_in_flight.inc()
+            try:
+                client = await self._get_client()
+                # The timeout covers the wait for each chunk, so a long reply is not cut off while it is still flowing
+                stream = await asyncio.wait_for(
+                    client.chat.completions.create(model=self.model, messages=messages, stream=True),
+                    timeout=self.timeout,
+                )
+                try:
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        if not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        if first:
+                            metrics.gpt_first_token.observe(time.perf_counter() - started)
+                            first = False
+                        yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()
+            finally:
+                metrics.gpt_in_flight.dec()
+                self._semaphore.release()
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            # The consumer stopped reading early or was cancelled
+            outcome = "cancelled"
+            raise
+        finally:
+            metrics.gpt_latency.observe(time.perf_counter() - started, outcome)
 
-    return(completion.choices[0].message.content)
\ No newline at end of file
+    async def close(self):
+        """Close the HTTP connections held by the client"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,114 @@
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from helper.config import Config
+
+# Command, guild and user of the interaction being handled by the current task
+log_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current interaction context onto every record"""
+
+    def filter(self, record: logging.LogRecord):
+        for key, value in log_context.get().items():
+            setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    CONTEXT_KEYS = ("command", "guild_id", "user_id")
+
+    def format(self, record: logging.LogRecord):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in self.CONTEXT_KEYS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that keeps the message and traceback apart for the JSON formatter"""
+
+    def prepare(self, record: logging.LogRecord):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _gzip_namer(name: str):
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as raw, gzip.open(dest, "wb") as compressed:
+        shutil.copyfileobj(raw, compressed)
+    os.remove(source)
+
+
+def _file_handler(path: str, config: Config):
+    if config.log_rotate_when == "size":
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.log_max_bytes, backupCount=config.log_backup_count, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=config.log_rotate_when, backupCount=config.log_backup_count, encoding="utf-8", utc=True
+        )
+    # Rotated files are compressed
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def setup_logging(path: str, config: Config):
+    """Route all logging through a queue so the event loop never waits on disk I/O
+
+    The root logger only enqueues records; a background thread formats them as JSON lines
+    and writes them to a rotating, compressing file.
+
+    Args:
+        path (str): Log file path
+        config (Config): Bot configuration, for rotation settings
+
+    Returns:
+        logging.handlers.QueueListener: The writer thread, already started. Call stop() on shutdown to drain it
+    """
+    records = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(records)
+    # The context has to be captured on the loop thread, before the record crosses the queue
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.log_level)
+
+    listener = logging.handlers.QueueListener(records, _file_handler(path, config), respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,229 @@
+import time
+from bisect import bisect_left
+from aiohttp import web
+import discord
+from discord import app_commands, Interaction
+from helper.log_pipeline import log_context
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Bucketed distribution of observations per label set"""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels: str):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str):
+        series = self.values.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def quantile(self, q: float, *labels: str):
+        """Estimate a quantile by interpolating within its bucket
+
+        Args:
+            q (float): Quantile, 0-1
+            *labels (str): Label values of the series
+
+        Returns:
+            float | None: Estimated value, None if nothing was observed
+        """
+        series = self.values.get(labels)
+        total = self.count(*labels)
+        if not total:
+            return None
+
+        rank = q * total
+        seen = 0
+        for index, in_bucket in enumerate(series[:-1]):
+            if seen + in_bucket >= rank and in_bucket:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index >= len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, in_bucket in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += in_bucket
+                lines.append(f"{self.name}_bucket{_labels((*self.labelnames, 'le'), (*labels, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Every metric the bot records"""
+
+    def __init__(self):
+        self.command_latency = Histogram("renfield_command_latency_seconds", "Application command latency", ("command",))
+        self.command_errors = Counter("renfield_command_errors_total", "Application commands that raised an error", ("command", "error"))
+        self.commands_in_flight = Gauge("renfield_commands_in_flight", "Application commands currently running", ("command",))
+        self.db_latency = Histogram("renfield_db_query_seconds", "Database call latency", ("operation",))
+        self.db_errors = Counter("renfield_db_errors_total", "Database calls that raised an error", ("operation",))
+        self.gpt_latency = Histogram("renfield_gpt_request_seconds", "OpenAI request latency", ("outcome",))
+        self.gpt_first_token = Histogram("renfield_gpt_first_token_seconds", "Time until the first streamed OpenAI token")
+        self.gpt_cache = Counter("renfield_gpt_cache_total", "Ghoul response cache lookups", ("result",))
+        self.gpt_in_flight = Gauge("renfield_gpt_in_flight", "OpenAI requests currently running")
+
+    def all(self):
+        return [value for value in vars(self).values() if isinstance(value, (Counter, Histogram))]
+
+    def summary(self):
+        """Human readable latency summary for the /stats command
+
+        Returns:
+            list[tuple[str, str]]: One field per series, name and value
+        """
+        fields = []
+        for title, histogram in (("Command", self.command_latency), ("DB", self.db_latency), ("GPT", self.gpt_latency)):
+            for labels in sorted(histogram.values):
+                count = histogram.count(*labels)
+                value = (
+                    f"{count} calls | p50 {histogram.quantile(0.5, *labels) * 1000:.0f} ms"
+                    f" | p99 {histogram.quantile(0.99, *labels) * 1000:.0f} ms"
+                )
+                if histogram is self.command_latency:
+                    errors = sum(n for key, n in self.command_errors.values.items() if key[0] == labels[0])
+                    in_flight = self.commands_in_flight.values.get(labels, 0)
+                    value += f" | {errors:.0f} errors | {in_flight:.0f} running"
+                fields.append((f"{title}: {' '.join(labels) or 'all'}", value))
+        return fields
+
+    def render(self):
+        """Prometheus text exposition of every metric
+
+        Returns:
+            str: Metrics in text format 0.0.4
+        """
+        lines = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _command_name(interaction: Interaction):
+    if interaction.command is not None:
+        return interaction.command.qualified_name
+    return interaction.data.get("name", "unknown") if interaction.data else "unknown"
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that times every application command and counts its errors"""
+
+    async def interaction_check(self, interaction: Interaction):
+        # Tag every log line written while handling this interaction
+        log_context.set({
+            "command": _command_name(interaction),
+            "guild_id": interaction.guild_id,
+            "user_id": interaction.user.id,
+        })
+        if interaction.type is discord.InteractionType.application_command:
+            interaction.extras["started"] = time.perf_counter()
+            metrics.commands_in_flight.inc(_command_name(interaction))
+        return True
+
+    def finish(self, interaction: Interaction, error: Exception | None = None):
+        """Record the end of a command started under interaction_check
+
+        Args:
+            interaction (Interaction): Discord Interaction Variable
+            error (Exception | None, optional): Error the command raised. Defaults to None.
+        """
+        started = interaction.extras.pop("started", None)
+        if started is None:
+            return
+        command = _command_name(interaction)
+        metrics.commands_in_flight.dec(command)
+        metrics.command_latency.observe(time.perf_counter() - started, command)
+        if error is not None:
+            metrics.command_errors.inc(command, type(getattr(error, "original", error)).__name__)
+
+    async def on_error(self, interaction: Interaction, error: app_commands.AppCommandError):
+        self.finish(interaction, error)
+        await super().on_error(interaction, error)
+
+
+class MetricsServer:
+    """Serves /metrics in Prometheus format on a local port"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def _handle(self, request: web.Request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,211 @@
+"""Versioned schema migrations
+
+Migrations are the NNNN_name.sql files in SQL_Scripts/migrations, applied in version order.
+Applied versions are recorded in the schema_migrations table. Run from src/:
+
+    python -m helper.migrations status    # Applied and pending migrations
+    python -m helper.migrations migrate   # Apply pending migrations
+    python -m helper.migrations explain   # Check the voting queries use their indexes
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+import pymysql
+from helper.config import Config
+from helper.renfield_sql import connect_args
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "SQL_Scripts", "migrations")
+LOCK_NAME = "renfield_schema_migrations"
+LOCK_TIMEOUT = 60  # Seconds to wait for another instance to finish migrating
+
+# Hot queries and the index EXPLAIN should report for them
+EXPLAIN_CHECKS = [
+    ("SELECT vote_id, option_index, COUNT(*) AS count FROM votes_users GROUP BY vote_id, option_index", "votes_users", "idx_votes_users_vote_option"),
+    ("SELECT id FROM votes WHERE group_id = 1 AND is_active = TRUE", "votes", "idx_votes_group_active"),
+]
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def statements(self):
+        """Statements of the script, split on semicolons ending a line, comments removed
+
+        Returns:
+            list[str]: SQL statements
+        """
+        lines = [re.sub(r"\s*--.*$", "", line) for line in self.sql.splitlines()]
+        return [statement.strip() for statement in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE) if statement.strip()]
+
+
+def discover(directory: str = MIGRATIONS_DIR):
+    """Every migration script, in version order
+
+    Args:
+        directory (str, optional): Folder holding the scripts. Defaults to SQL_Scripts/migrations.
+
+    Raises:
+        ValueError: Two scripts share a version number
+
+    Returns:
+        list[Migration]: The migrations
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {migrations[version].path} and {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _applied(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INT PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " checksum CHAR(64) NOT NULL,"
+        " applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    )
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in cursor.fetchall()}
+
+
+def migrate(connection: pymysql.connections.Connection, migrations: list[Migration] | None = None):
+    """Apply every pending migration, holding a named lock so concurrent instances take turns
+
+    MySQL commits DDL implicitly, so a migration that fails part way is not rolled back and
+    is not recorded; fix the script or the schema and run again.
+
+    Args:
+        connection (pymysql.connections.Connection): Connection with a DictCursor
+        migrations (list[Migration] | None, optional): Migrations to consider. Defaults to discover().
+
+    Raises:
+        RuntimeError: The lock could not be taken or a migration failed
+
+    Returns:
+        list[Migration]: The migrations applied by this call
+    """
+    migrations = discover() if migrations is None else migrations
+    done = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (LOCK_NAME, LOCK_TIMEOUT))
+        if not cursor.fetchone()["locked"]:
+            raise RuntimeError(f"Timed out after {LOCK_TIMEOUT}s waiting for another instance to finish migrating")
+        try:
+            applied = _applied(cursor)
+            for migration in migrations:
+                if migration.version in applied:
+                    if applied[migration.version] != migration.checksum:
+                        logger.warning(f"Migration {migration.version} {migration.name} changed after it was applied")
+                    continue
+                logger.info(f"Applying migration {migration.version} {migration.name}")
+                try:
+                    for statement in migration.statements():
+                        cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (migration.version, migration.name, migration.checksum),
+                    )
+                    connection.commit()
+                except pymysql.MySQLError as err:
+                    connection.rollback()
+                    raise RuntimeError(f"Migration {migration.version} {migration.name} failed: {err}")
+                done.append(migration)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+    return done
+
+
+def migrate_database(config: Config):
+    """Open a connection and apply pending migrations. Blocking, run it in a thread from async code
+
+    Args:
+        config (Config): Bot configuration, for credentials
+
+    Raises:
+        RuntimeError: MySQL is unreachable or a migration failed
+
+    Returns:
+        list[Migration]: The migrations applied
+    """
+    try:
+        connection = pymysql.connect(**connect_args(config))
+    except pymysql.MySQLError as err:
+        raise RuntimeError(f"MySQL Connection Failed: {err}")
+    try:
+        return migrate(connection)
+    finally:
+        connection.close()
+
+
+def explain(connection: pymysql.connections.Connection):
+    """Run EXPLAIN on the hot voting queries and compare the chosen index with the expected one
+
+    Args:
+        connection (pymysql.connections.Connection): Connection with a DictCursor
+
+    Returns:
+        list[tuple[str, str, str | None]]: Query, expected index and the index MySQL chose, for every mismatch
+    """
+    failures = []
+    with connection.cursor() as cursor:
+        for query, table, index in EXPLAIN_CHECKS:
+            cursor.execute("EXPLAIN " + query)
+            chosen = next((row["key"] for row in cursor.fetchall() if row["table"] == table), None)
+            if chosen != index:
+                failures.append((query, index, chosen))
+    return failures
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m helper.migrations", description="Renfield schema migrations")
+    parser.add_argument("command", choices=("status", "migrate", "explain"))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    config = Config.from_env()
+    connection = pymysql.connect(**connect_args(config))
+    try:
+        if args.command == "migrate":
+            applied = migrate(connection)
+            print(f"Applied {len(applied)} migration(s)")
+        elif args.command == "status":
+            with connection.cursor() as cursor:
+                applied = _applied(cursor)
+            for migration in discover():
+                state = "applied" if migration.version in applied else "pending"
+                if migration.version in applied and applied[migration.version] != migration.checksum:
+                    state = "applied, changed since"
+                print(f"{migration.version:04d} {migration.name}: {state}")
+        else:
+            failures = explain(connection)
+            for query, index, chosen in failures:
+                print(f"FAIL {query}\n     expected {index}, MySQL chose {chosen}")
+            print(f"{len(EXPLAIN_CHECKS) - len(failures)}/{len(EXPLAIN_CHECKS)} queries use their index")
+            return 1 if failures else 0
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
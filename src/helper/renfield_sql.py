@@ -1,62 +1,338 @@
 import pymysql
-import os
-from dotenv import load_dotenv
-import base64
-import hashlib
-
-# Load environment variables
-load_dotenv()
-DATABASE_USERNAME = os.getenv("DATABASE_USERNAME")
-DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD")
-ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
-
-config = {
-    "host": "localhost",
-    "user": DATABASE_USERNAME,
-    "password": DATABASE_PASSWORD,
-    "database": "renfield",
-    "cursorclass": pymysql.cursors.DictCursor,
-    "autocommit": True,
-}
-
-class Renfield_SQL:
-    def __init__(self):
-        if not ENCRYPTION_KEY:
-            raise ValueError("ENCRYPTION_KEY is missing from environment variables")
-
-        # Ensure the key is 32 bytes (AES-256 requires 256-bit key)
-        self.key = hashlib.sha256(ENCRYPTION_KEY.encode()).digest()
-
-    def connect(self):
-        """Connect to database
+import logging
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from helper.config import Config
+from helper.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def connect_args(config: Config):
+    """pymysql.connect arguments for the configured database
+
+    Args:
+        config (Config): Bot configuration
+
+    Returns:
+        dict: Keyword arguments for pymysql.connect
+    """
+    return {
+        "host": config.database_host,
+        "user": config.database_username,
+        "password": config.database_password,
+        "database": config.database_name,
+        "cursorclass": pymysql.cursors.DictCursor,
+        "autocommit": True,
+    }
 
-        Raises:
-            RuntimeError: Fails to connect to database
+
+class Renfield_Connection:
+    """A pooled MySQL connection whose blocking calls run on the pool's worker threads"""
+
+    def __init__(self, pool: "Renfield_Pool", connection: pymysql.connections.Connection):
+        self.pool = pool
+        self.connection = connection
+        self.last_used = time.monotonic()
+        self.broken = False
+        self._call: asyncio.Future | None = None  # Blocking call in progress on a worker thread
+
+    async def _run(self, func, *args):
+        """Run a blocking call against this connection off the event loop
+
+        Args:
+            func (Callable): Blocking function to run
+            *args: Arguments passed to func
 
         Returns:
-            _type_: _description_
+            Any: Result of func
         """
+        operation = getattr(func, "__name__", "run").lstrip("_")
+        started = time.perf_counter()
+        self._call = asyncio.ensure_future(self.pool.run_blocking(func, *args))
         try:
-            self.connection = pymysql.connect(**config)
-            self.cursor = self.connection.cursor()
-            return self.cursor
+            # Shielded so cancelling the caller never abandons the worker thread mid-query
+            return await asyncio.shield(self._call)
+        except asyncio.CancelledError:
+            # The thread still uses the connection and may leave a transaction open, retire it once done
+            self.broken = True
+            raise
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            # The socket is gone, make sure the pool does not hand this connection out again
+            self.broken = True
+            metrics.db_errors.inc(operation)
+            raise
+        except pymysql.MySQLError:
+            metrics.db_errors.inc(operation)
+            raise
+        finally:
+            metrics.db_latency.observe(time.perf_counter() - started, operation)
+
+    async def settle(self):
+        """Wait for a blocking call left running by a cancelled caller"""
+        call = self._call
+        if call is not None and not call.done():
+            await asyncio.wait({call})
+        if call is not None and not call.cancelled():
+            call.exception()  # Retrieved, so an abandoned failure is not logged as never retrieved
+
+    def _fetchone(self, query: str, args):
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, args)
+            return cursor.fetchone()
+
+    def _fetchall(self, query: str, args):
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, args)
+            return cursor.fetchall()
+
+    def _execute(self, query: str, args):
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, args)
+            return cursor.lastrowid
+
+    def _executemany(self, query: str, args):
+        with self.connection.cursor() as cursor:
+            return cursor.executemany(query, args)
+
+    async def fetchone(self, query: str, args=None):
+        """Run a query and return the first row
+
+        Args:
+            query (str): SQL query
+            args (tuple | dict, optional): Query parameters. Defaults to None.
+
+        Returns:
+            dict | None: First row of the result
+        """
+        return await self._run(self._fetchone, query, args)
+
+    async def fetchall(self, query: str, args=None):
+        """Run a query and return every row
+
+        Args:
+            query (str): SQL query
+            args (tuple | dict, optional): Query parameters. Defaults to None.
+
+        Returns:
+            list[dict]: Rows of the result
+        """
+        return await self._run(self._fetchall, query, args)
+
+    async def execute(self, query: str, args=None):
+        """Run a statement
+
+        Args:
+            query (str): SQL statement
+            args (tuple | dict, optional): Statement parameters. Defaults to None.
+
+        Returns:
+            int: ID of the last inserted row
+        """
+        return await self._run(self._execute, query, args)
+
+    async def executemany(self, query: str, args):
+        """Run a statement once per parameter set. INSERT statements are sent as one multi-row insert
+
+        Args:
+            query (str): SQL statement
+            args (list): Parameter sets
+
+        Returns:
+            int: Number of affected rows
+        """
+        return await self._run(self._executemany, query, args)
+
+    async def run(self, func, *args):
+        """Run a blocking function that needs the raw connection, e.g. to stream with an unbuffered cursor
+
+        Args:
+            func (Callable): Blocking function, called as func(connection, *args) on a worker thread
+            *args: Further arguments passed to func
+
+        Returns:
+            Any: Result of func
+        """
+        return await self._run(func, self.connection, *args)
+
+
+class Renfield_Pool:
+    """Bounded pool of MySQL connections that keeps all database I/O off the event loop thread"""
+
+    def __init__(self, config: Config, health_check_interval: float = 30.0):
+        """Create the pool. Connections are opened lazily on first use
+
+        Args:
+            config (Config): Bot configuration, for credentials, pool size and acquire timeout
+            health_check_interval (float, optional): Idle seconds after which a connection is pinged before reuse. Defaults to 30.0.
+        """
+        self.connect_args = connect_args(config)
+        self.size = config.database_pool_size
+        self.acquire_timeout = config.database_acquire_timeout
+        self.health_check_interval = health_check_interval
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._idle: list[Renfield_Connection] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="renfield-sql")
+        self._closed = False
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking function on the pool's worker threads
+
+        Args:
+            func (Callable): Blocking function to run
+            *args: Arguments passed to func
+
+        Returns:
+            Any: Result of func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _retire(self, connection: pymysql.connections.Connection):
+        """Close a connection from a worker thread without waiting for it"""
+        try:
+            self._executor.submit(self._close, connection)
+        except RuntimeError:  # The executor is already shut down
+            self._close(connection)
+
+    async def _shielded(self, func, *args, abandoned=None):
+        """Run a blocking call on a worker thread that a cancelled caller cannot abandon half done
+
+        Args:
+            func (Callable): Blocking function to run
+            *args: Arguments passed to func
+            abandoned (Callable, optional): Called with the finished call if the caller was cancelled. Defaults to None.
+
+        Returns:
+            Any: Result of func
+        """
+        call = asyncio.ensure_future(self.run_blocking(func, *args))
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            if abandoned is not None:
+                call.add_done_callback(abandoned)
+            raise
+
+    def _retire_opened(self, call: asyncio.Future):
+        if not call.cancelled() and call.exception() is None:
+            self._retire(call.result())
+
+    def _open(self):
+        try:
+            return pymysql.connect(**self.connect_args)
         except pymysql.MySQLError as err:
             raise RuntimeError(f"MySQL Connection Failed: {err}")
 
-    def disconnect(self):
-        """Disconnect from database"""
+    def _check(self, connection: pymysql.connections.Connection):
+        """Ping a connection, reconnecting it if the server dropped it"""
         try:
-            if hasattr(self, "cursor") and self.cursor:
-                self.cursor.close()
-            if hasattr(self, "connection") and self.connection:
-                self.connection.close()
-        except pymysql.MySQLError as err:
-            print(f"Error closing MySQL connection: {err}")
+            connection.ping(reconnect=True)
+            return True
+        except pymysql.MySQLError:
+            return False
 
-    def commit(self):
-        """Commit change to the database"""
+    def _close(self, connection: pymysql.connections.Connection):
         try:
-            if hasattr(self, "connection") and self.connection:
-                self.connection.commit()
-        except pymysql.MySQLError as err:
-            print(f"Error committing transaction: {err}")
\ No newline at end of file
+            connection.close()
+        except pymysql.MySQLError:
+            pass
+
+    async def acquire(self):
+        """Take a connection from the pool, opening one if none are idle
+
+        Raises:
+            RuntimeError: The pool is closed, no connection became free in time or MySQL is unreachable
+
+        Returns:
+            Renfield_Connection: A healthy connection. Must be handed back with release()
+        """
+        if self._closed:
+            raise RuntimeError("Database pool is closed")
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics.db_errors.inc("acquire")
+            raise RuntimeError(f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if time.monotonic() - conn.last_used < self.health_check_interval:
+                    return conn
+                # If the caller is cancelled mid-check, nobody holds the connection any more; close it
+                if await self._shielded(self._check, conn.connection, abandoned=lambda _: self._retire(conn.connection)):
+                    return conn
+                await self.run_blocking(self._close, conn.connection)
+
+            # Likewise a connection the thread finishes opening after the caller was cancelled
+            opened = await self._shielded(self._open, abandoned=self._retire_opened)
+            return Renfield_Connection(self, opened)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        finally:
+            # Time spent waiting for a slot, health checks and opening connections
+            metrics.db_latency.observe(time.perf_counter() - started, "acquire")
+
+    async def release(self, conn: Renfield_Connection):
+        """Hand a connection back to the pool
+
+        Args:
+            conn (Renfield_Connection): Connection obtained from acquire()
+        """
+        try:
+            # Never close or reuse a connection while a worker thread is still on it
+            await conn.settle()
+            if conn.broken or self._closed:
+                await self.run_blocking(self._close, conn.connection)
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the duration of an ``async with`` block
+
+        Yields:
+            Renfield_Connection: A healthy pooled connection
+        """
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def fetchone(self, query: str, args=None):
+        """Run a single query on a pooled connection and return the first row"""
+        async with self.connection() as conn:
+            return await conn.fetchone(query, args)
+
+    async def fetchall(self, query: str, args=None):
+        """Run a single query on a pooled connection and return every row"""
+        async with self.connection() as conn:
+            return await conn.fetchall(query, args)
+
+    async def execute(self, query: str, args=None):
+        """Run a single statement on a pooled connection and return the last inserted ID"""
+        async with self.connection() as conn:
+            return await conn.execute(query, args)
+
+    async def run(self, func, *args):
+        """Run a blocking function against a pooled connection, see Renfield_Connection.run"""
+        async with self.connection() as conn:
+            return await conn.run(func, *args)
+
+    async def close(self):
+        """Close every idle connection and stop the worker threads"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self.run_blocking(self._close, conn.connection)
+        self._executor.shutdown(wait=False)
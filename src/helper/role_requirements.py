@@ -1,7 +1,68 @@
 import discord
 from discord import app_commands, Interaction
-import os
-from dotenv import load_dotenv
+
+
+class RoleCache:
+    """Required role IDs per guild and the authorization result per member"""
+
+    def __init__(self):
+        self.role_names: frozenset[str] = frozenset()
+        self._required: dict[int, frozenset[int]] = {}  # guild_id -> required role IDs
+        self._members: dict[tuple[int, int], bool] = {}  # (guild_id, user_id) -> authorized
+
+    def configure(self, role_names: frozenset[str]):
+        """Set the roles that grant access and forget every cached result
+
+        Args:
+            role_names (frozenset[str]): Names of the roles that grant access
+        """
+        self.role_names = role_names
+        self._required = {}
+        self._members = {}
+
+    def required_roles(self, guild: discord.Guild):
+        """Resolve the required role names to IDs, once per guild
+
+        Args:
+            guild (discord.Guild): Guild to resolve roles in
+
+        Returns:
+            frozenset[int]: IDs of the roles that grant access
+        """
+        required = self._required.get(guild.id)
+        if required is None:
+            required = frozenset(role.id for role in guild.roles if role.name in self.role_names)
+            self._required[guild.id] = required
+        return required
+
+    def is_authorized(self, member: discord.Member):
+        """Check if a member has at least one required role
+
+        Args:
+            member (discord.Member): Member to check
+
+        Returns:
+            bool: The member holds a required role
+        """
+        key = (member.guild.id, member.id)
+        authorized = self._members.get(key)
+        if authorized is None:
+            authorized = not self.required_roles(member.guild).isdisjoint(role.id for role in member.roles)
+            self._members[key] = authorized
+        return authorized
+
+    def invalidate_member(self, guild_id: int, user_id: int):
+        """Forget a member's result after their roles change"""
+        self._members.pop((guild_id, user_id), None)
+
+    def invalidate_guild(self, guild_id: int):
+        """Forget everything about a guild after its roles change"""
+        self._required.pop(guild_id, None)
+        self._members = {key: value for key, value in self._members.items() if key[0] != guild_id}
+
+
+role_cache = RoleCache()  # Configured from REQUIRED_ROLES by bot.py
+
 
 def role_check():
     """Check if the user has at least one required role"""
@@ -17,20 +78,16 @@ def role_check():
         Returns:
             _type_: The user does have at least one required role
         """
-        load_dotenv()
-        REQUIRED_ROLES = os.getenv("REQUIRED_ROLES").split(",")
-        
         if interaction.guild is None:
             raise app_commands.CheckFailure("This command can only be used in a server!")
 
-        user_roles = [role.name for role in interaction.user.roles]  # Get user roles by name
-        if any(role in user_roles for role in REQUIRED_ROLES):
-            return True  
+        if role_cache.is_authorized(interaction.user):
+            return True
 
         # ✅ Ensure the bot responds before raising an error
         if not interaction.response.is_done():
             await interaction.response.send_message("You do not have permission to use this command!", ephemeral=True)
-        
+
         raise app_commands.CheckFailure("You do not have permission to use this command!")
 
-    return app_commands.check(predicate)
\ No newline at end of file
+    return app_commands.check(predicate)
@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+from helper.dice_engine import split_difficulty
+from helper.renfield_sql import Renfield_Pool
+
+logger = logging.getLogger(__name__)
+
+# One fixed-size record per roll; faces only reach the per-user face counts
+ROLL_DTYPE = np.dtype([
+    ("rolled_at", np.float64),
+    ("dice", np.uint8),
+    ("difficulty", np.uint8),
+    ("speciality", np.bool_),
+    ("successes", np.int16),
+    ("botch", np.bool_),
+])
+FACES = 10
+MAX_PENDING = 10_000  # Unwritten rolls kept while MySQL is unreachable, the oldest are dropped beyond this
+
+STATS_COLUMNS = ["rolls", "successes", "botches"] + [f"face_{face}" for face in range(1, FACES + 1)]
+
+
+class RollHistory:
+    """Recent rolls of one user in a ring buffer, with running totals over every roll"""
+
+    def __init__(self, capacity: int):
+        """Create an empty history
+
+        Args:
+            capacity (int): Recent rolls kept, older ones are overwritten
+        """
+        self._rolls = np.zeros(capacity, dtype=ROLL_DTYPE)
+        self._next = 0  # Slot the next roll is written to
+        self._size = 0
+        self.rolls = 0
+        self.successes = 0
+        self.botches = 0
+        self.faces = np.zeros(FACES, dtype=np.int64)  # Count of each face 1-10
+        self.loaded = False  # Whether the totals include rolls stored before this history was created
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._rolls)
+
+    @property
+    def nbytes(self):
+        return self._rolls.nbytes + self.faces.nbytes
+
+    @property
+    def mean_successes(self):
+        return self.successes / self.rolls if self.rolls else 0.0
+
+    @property
+    def botch_rate(self):
+        return self.botches / self.rolls if self.rolls else 0.0
+
+    def add(self, record: tuple, face_counts: np.ndarray):
+        """Add a roll, overwriting the oldest one when full
+
+        Args:
+            record (tuple): Fields of ROLL_DTYPE, in order
+            face_counts (np.ndarray): How often each face 1-10 came up
+        """
+        self._rolls[self._next] = record
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.rolls += 1
+        self.successes += int(record[4])
+        self.botches += int(record[5])
+        self.faces += face_counts
+
+    def recent(self, limit: int | None = None):
+        """The rolls in the buffer, newest first
+
+        Args:
+            limit (int | None, optional): Maximum rolls to return. Defaults to all of them.
+
+        Returns:
+            np.ndarray: Records of ROLL_DTYPE
+        """
+        order = (self._next - 1 - np.arange(self._size)) % self.capacity
+        return self._rolls[order[:limit]]
+
+
+def summarize(faces: list[int], difficulty: int, speciality: bool, successes: int, rolled_at: float | None = None):
+    """Reduce a roll to a history record and its face counts
+
+    Args:
+        faces (list[int]): Rolled faces
+        difficulty (int): Requested difficulty
+        speciality (bool): Whether a speciality was applied
+        successes (int): Net successes
+        rolled_at (float | None, optional): Unix time of the roll. Defaults to now.
+
+    Returns:
+        tuple[tuple, np.ndarray]: Record of ROLL_DTYPE and counts of each face 1-10
+    """
+    target, _ = split_difficulty(difficulty)
+    face_counts = np.bincount(faces, minlength=FACES + 1)[1:]
+    # Same rule as the odds: no die reaching the target and at least one 1
+    botch = not any(face >= target for face in faces) and face_counts[0] > 0
+    # Clamped to the column types; only absurd difficulties reach the limits
+    difficulty = max(0, min(difficulty, 255))
+    successes = max(-32768, min(successes, 32767))
+    record = (time.time() if rolled_at is None else rolled_at, len(faces), difficulty, speciality, successes, botch)
+    return record, face_counts
+
+
+class RollLog:
+    """Roll histories of recently active users, written to MySQL in batches in the background
+
+    At most max_users histories are kept in memory, least recently used first out, so the
+    footprint is bounded however many players roll. A history not in memory is read back
+    from the database when it is asked for.
+    """
+
+    def __init__(self, db: Renfield_Pool, capacity: int, max_users: int, flush_interval: float):
+        """Create the log. Call start() before recording
+
+        Args:
+            db (Renfield_Pool): Database pool
+            capacity (int): Recent rolls kept per user
+            max_users (int): Users whose history is kept in memory
+            flush_interval (float): Seconds between background writes
+        """
+        self.db = db
+        self.capacity = capacity
+        self.max_users = max_users
+        self.flush_interval = flush_interval
+        self._users: OrderedDict[int, RollHistory] = OrderedDict()
+        self._pending: list[tuple[int, tuple, np.ndarray]] = []  # (user_id, record, face_counts)
+        self._lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _history(self, user_id: int):
+        history = self._users.get(user_id)
+        if history is None:
+            history = self._users[user_id] = RollHistory(self.capacity)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return history
+
+    def record(self, user_id: int, faces: list[int], difficulty: int, speciality: bool, successes: int):
+        """Add a roll to a user's history and queue it for the database
+
+        Args:
+            user_id (int): Discord ID of the roller
+            faces (list[int]): Rolled faces
+            difficulty (int): Requested difficulty
+            speciality (bool): Whether a speciality was applied
+            successes (int): Net successes
+        """
+        record, face_counts = summarize(faces, difficulty, speciality, successes)
+        self._history(user_id).add(record, face_counts)
+        self._pending.append((user_id, record, face_counts))
+        if len(self._pending) > MAX_PENDING:
+            dropped = len(self._pending) - MAX_PENDING
+            del self._pending[:dropped]
+            logger.warning(f"Roll history backlog full, dropped {dropped} unwritten rolls")
+
+    async def history(self, user_id: int):
+        """Get a user's history, reading it from the database if it is not complete in memory
+
+        Args:
+            user_id (int): Discord ID of the user
+
+        Returns:
+            RollHistory: The user's recent rolls and totals
+        """
+        history = self._users.get(user_id)
+        if history is not None and history.loaded:
+            self._users.move_to_end(user_id)
+            return history
+
+        # The background writer waits until the rows are read, so every roll is in exactly one of the query and the queue
+        async with self._lock:
+            await self._flush()
+            async with self.db.connection() as conn:
+                stats = await conn.fetchone(f"SELECT {', '.join(STATS_COLUMNS)} FROM dice_roll_stats WHERE user_id = %s", (user_id,))
+                rows = await conn.fetchall(
+                    "SELECT rolled_at, dice, difficulty, speciality, successes, botch FROM dice_rolls "
+                    "WHERE user_id = %s ORDER BY id DESC LIMIT %s",
+                    (user_id, self.capacity),
+                )
+
+            history = RollHistory(self.capacity)
+            no_faces = np.zeros(FACES, dtype=np.int64)
+            for row in reversed(rows):
+                rolled_at = row["rolled_at"].replace(tzinfo=timezone.utc).timestamp()
+                history.add((rolled_at, row["dice"], row["difficulty"], bool(row["speciality"]), row["successes"], bool(row["botch"])), no_faces)
+            # The buffer only holds the latest rolls, the totals cover every stored roll
+            if stats:
+                history.rolls, history.successes, history.botches = stats["rolls"], stats["successes"], stats["botches"]
+                history.faces = np.array([stats[f"face_{face}"] for face in range(1, FACES + 1)], dtype=np.int64)
+            # Rolls made while the query ran are still queued
+            for queued_user, record, face_counts in self._pending:
+                if queued_user == user_id:
+                    history.add(record, face_counts)
+            history.loaded = True
+
+        self._users[user_id] = history
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return history
+
+    async def flush(self):
+        """Write every queued roll and add it to the per-user totals
+
+        Raises:
+            Exception: The write failed. The rolls stay queued for the next flush
+        """
+        async with self._lock:
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        # Shielded: a caller cancelled while COMMIT is on its way must not re-queue a batch that gets committed
+        await asyncio.shield(self._write(batch))
+
+    async def _write(self, batch: list[tuple[int, tuple, np.ndarray]]):
+        totals: dict[int, np.ndarray] = {}
+        for user_id, record, face_counts in batch:
+            total = totals.setdefault(user_id, np.zeros(len(STATS_COLUMNS), dtype=np.int64))
+            total[:3] += (1, record[4], record[5])
+            total[3:] += face_counts
+
+        try:
+            async with self.db.connection() as conn:
+                # One transaction, so a failed write stores nothing and can be retried as a whole
+                await conn.execute("BEGIN")
+                try:
+                    await conn.executemany(
+                        "INSERT INTO dice_rolls (user_id, rolled_at, dice, difficulty, speciality, successes, botch) "
+                        "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                        [
+                            (user_id, datetime.fromtimestamp(record[0], timezone.utc).replace(tzinfo=None), *(int(value) for value in record[1:]))
+                            for user_id, record, _ in batch
+                        ],
+                    )
+                    await conn.executemany(
+                        f"INSERT INTO dice_roll_stats (user_id, {', '.join(STATS_COLUMNS)}) "
+                        f"VALUES ({', '.join(['%s'] * (len(STATS_COLUMNS) + 1))}) "
+                        f"ON DUPLICATE KEY UPDATE {', '.join(f'{column} = {column} + VALUES({column})' for column in STATS_COLUMNS)}",
+                        [(user_id, *total.tolist()) for user_id, total in totals.items()],
+                    )
+                    await conn.execute("COMMIT")
+                except BaseException:
+                    # Closing the connection discards the open transaction
+                    conn.broken = True
+                    raise
+        except BaseException:
+            self._pending[:0] = batch
+            raise
+
+    def start(self):
+        """Start the background writer"""
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error writing roll history, {len(self._pending)} rolls still queued: {e}", exc_info=True)
+
+    async def close(self):
+        """Stop the background writer and write out every queued roll"""
+        if self._task is not None:
+            # Signalled rather than cancelled, so a write in progress finishes its transaction first
+            self._stopping.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error writing roll history on shutdown, {len(self._pending)} rolls lost: {e}", exc_info=True)
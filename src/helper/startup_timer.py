@@ -0,0 +1,36 @@
+import time
+
+
+class StartupTimer:
+    """Time spent in each startup phase, for one summary log line once the bot is ready"""
+
+    def __init__(self, started: float | None = None):
+        """Start timing
+
+        Args:
+            started (float | None, optional): time.perf_counter() value startup began at. Defaults to now.
+        """
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self.phases: list[tuple[str, float]] = []
+        self.done = False
+
+    def mark(self, phase: str):
+        """End a phase, which began when the previous one ended
+
+        Args:
+            phase (str): Name of the phase that just finished
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        """Finish timing
+
+        Returns:
+            str: Every phase and the total, in milliseconds
+        """
+        self.done = True
+        phases = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases)
+        return f"Startup: {phases}; ready in {(self._last - self.started) * 1000:.0f} ms"
@@ -0,0 +1,65 @@
+import time
+from discord import Interaction
+
+# Discord's limit on message content
+MESSAGE_LIMIT = 2000
+
+
+def _split_point(text: str, limit: int):
+    """Index to cut text at so the first part fits in limit, preferring a line or word break"""
+    for separator in ("\n", " "):
+        cut = text.rfind(separator, limit // 2, limit)
+        if cut != -1:
+            return cut
+    return limit
+
+
+class StreamedReply:
+    """Followup messages that grow as text arrives
+
+    Edits are coalesced so each message is edited at most once per interval, and text past
+    Discord's message limit rolls over into a new followup.
+    """
+
+    def __init__(self, interaction: Interaction, interval: float = 1.0, limit: int = MESSAGE_LIMIT):
+        self.interaction = interaction
+        self.interval = interval
+        self.limit = limit
+        self.text = ""  # Text of the message currently being written
+        self.sent = 0  # Messages sent so far
+        self._message = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def _show(self, text: str):
+        # Discord rejects blank messages, so whitespace waits for real text
+        if not text.strip() or text == self._shown:
+            return
+        if self._message is None:
+            self._message = await self.interaction.followup.send(text, wait=True)
+            self.sent += 1
+        else:
+            await self._message.edit(content=text)
+        self._shown = text
+        self._last_edit = time.monotonic()
+
+    async def append(self, piece: str):
+        """Add text, updating Discord if the last edit is older than the interval
+
+        Args:
+            piece (str): Text to add
+        """
+        self.text += piece
+        while len(self.text) > self.limit:
+            cut = _split_point(self.text, self.limit)
+            # Complete the current message, then carry on in a new one
+            await self._show(self.text[:cut])
+            self._message = None
+            self._shown = ""
+            self.text = self.text[cut:].lstrip()
+        if time.monotonic() - self._last_edit >= self.interval:
+            await self._show(self.text)
+
+    async def finish(self):
+        """Show whatever text is still pending"""
+        await self._show(self.text)
@@ -0,0 +1,76 @@
+from bisect import bisect_left, insort
+from helper.renfield_sql import Renfield_Pool
+
+
+class GroupIndex:
+    """In-memory index of vote group names for prefix and substring lookups"""
+
+    def __init__(self):
+        self._groups: dict[str, tuple[str, int]] = {}  # casefolded name -> (group_name, id)
+        self._keys: list[str] = []  # casefolded names, kept sorted for prefix search
+
+    def __len__(self):
+        return len(self._keys)
+
+    async def load(self, db: Renfield_Pool):
+        """Replace the index with every group in the database
+
+        Args:
+            db (Renfield_Pool): Database pool
+        """
+        rows = await db.fetchall("SELECT id, group_name FROM vote_groups")
+        self._groups = {row["group_name"].casefold(): (row["group_name"], row["id"]) for row in rows}
+        self._keys = sorted(self._groups)
+
+    def add(self, group_name: str, group_id: int):
+        """Add a newly created group to the index
+
+        Args:
+            group_name (str): Name of the group
+            group_id (int): ID of the group in vote_groups
+        """
+        key = group_name.casefold()
+        if key not in self._groups:
+            insort(self._keys, key)
+        self._groups[key] = (group_name, group_id)
+
+    def get(self, group_name: str):
+        """Look up the ID of a group by name
+
+        Args:
+            group_name (str): Name of the group, case-insensitive
+
+        Returns:
+            int | None: ID of the group, or None if it does not exist
+        """
+        group = self._groups.get(group_name.casefold())
+        return group[1] if group else None
+
+    def search(self, current: str, limit: int = 10):
+        """Find group names containing current, prefix matches first
+
+        Args:
+            current (str): Text typed so far, case-insensitive
+            limit (int, optional): Maximum number of names to return. Defaults to 10.
+
+        Returns:
+            list[str]: Matching group names
+        """
+        needle = current.casefold()
+        matches = []
+
+        # Prefix matches are a contiguous run of the sorted keys
+        index = bisect_left(self._keys, needle)
+        while index < len(self._keys) and len(matches) < limit and self._keys[index].startswith(needle):
+            matches.append(self._keys[index])
+            index += 1
+
+        if len(matches) < limit:
+            prefixed = set(matches)
+            for key in self._keys:
+                if needle in key and key not in prefixed:
+                    matches.append(key)
+                    if len(matches) >= limit:
+                        break
+
+        return [self._groups[key][0] for key in matches]
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import discord
+from helper.renfield_sql import Renfield_Pool
+from helper.vote_tally import TallyCache, VoteTally
+
+logger = logging.getLogger(__name__)
+
+BAR_WIDTH = 12
+MESSAGE_LIMIT = 2000
+MESSAGES_PER_VOTE = 5  # Most recent messages kept live for one vote, older ones stop updating
+
+
+def progress_bar(count: int, total: int, width: int = BAR_WIDTH):
+    """Text bar showing count as a share of total
+
+    Args:
+        count (int): Votes for the option
+        total (int): Votes cast
+        width (int, optional): Bar length in characters. Defaults to BAR_WIDTH.
+
+    Returns:
+        str: The bar and percentage
+    """
+    share = count / total if total else 0
+    filled = round(share * width)
+    return f"{'█' * filled}{'░' * (width - filled)} {share:>4.0%}"
+
+
+def render_vote(tally: VoteTally):
+    """Message content for a vote, with running counts
+
+    Args:
+        tally (VoteTally): Vote to show
+
+    Returns:
+        str: Message content
+    """
+    winners = tally.winners() if tally.total and not tally.is_active else []
+    header = f"**Vote:** {tally.vote_name}" + ("" if tally.is_active else " (ended)")
+    footer = f"**Total Votes:** {tally.total}\n" + (
+        "Click below to vote:" if tally.is_active else f"## Winner: {', '.join(winners) if winners else 'No votes'}"
+    )
+
+    def option_lines(bars: bool, label_limit: int):
+        for option, count in tally.results():
+            label = option if len(option) <= label_limit else option[:label_limit - 1] + "…"
+            label = f"**{label}**" if option in winners else label
+            yield f"{label}\n`{progress_bar(count, tally.total)}` {count}" if bars else f"{label}: {count}"
+
+    # Many long options would pass the message limit with bars; fall back to plain counts
+    for bars, label_limit in ((True, 80), (False, 60), (False, 30)):
+        content = "\n".join([header, *option_lines(bars, label_limit), footer])
+        if len(content) <= MESSAGE_LIMIT:
+            break
+    return content
+
+
+class LiveVoteMessages:
+    """Keeps posted vote messages showing current counts
+
+    Ballots only mark their vote as changed; a background task edits each changed vote's
+    messages at most once per interval, so a burst of clicks becomes one edit.
+    """
+
+    def __init__(self, bot: discord.Client, db: Renfield_Pool, tallies: TallyCache, interval: float):
+        """Create the updater. Call load() and start() before use
+
+        Args:
+            bot (discord.Client): Bot, to look up channels
+            db (Renfield_Pool): Database pool
+            tallies (TallyCache): Source of the counts
+            interval (float): Seconds between edits of one vote's messages
+        """
+        self.bot = bot
+        self.db = db
+        self.tallies = tallies
+        self.interval = interval
+        self._messages: dict[int, list[tuple[int, int]]] = {}  # vote_id -> (channel_id, message_id), oldest first
+        self._changed: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    async def load(self):
+        """Load the messages of every active vote"""
+        rows = await self.db.fetchall(
+            "SELECT m.vote_id, m.channel_id, m.message_id FROM vote_messages m JOIN votes v ON v.id = m.vote_id "
+            "WHERE v.is_active = TRUE ORDER BY m.vote_id, m.message_id"
+        )
+        self._messages = {}
+        for row in rows:
+            self._messages.setdefault(row["vote_id"], []).append((row["channel_id"], row["message_id"]))
+
+    def start(self):
+        """Start the background editor"""
+        self._task = asyncio.create_task(self._run())
+
+    async def track(self, vote_id: int, channel_id: int, message_id: int):
+        """Keep a newly posted vote message up to date
+
+        Args:
+            vote_id (int): ID of the vote
+            channel_id (int): Channel the message was posted in
+            message_id (int): ID of the message
+        """
+        messages = self._messages.setdefault(vote_id, [])
+        messages.append((channel_id, message_id))
+        await self.db.execute(
+            "INSERT INTO vote_messages (vote_id, channel_id, message_id) VALUES (%s, %s, %s)",
+            (vote_id, channel_id, message_id),
+        )
+        if len(messages) > MESSAGES_PER_VOTE:
+            _, oldest = messages.pop(0)
+            await self.db.execute("DELETE FROM vote_messages WHERE vote_id = %s AND message_id = %s", (vote_id, oldest))
+
+    def changed(self, vote_id: int):
+        """Note that a vote's counts changed. Its messages are edited by the next update
+
+        Args:
+            vote_id (int): ID of the vote
+        """
+        if vote_id in self._messages:
+            self._changed.add(vote_id)
+
+    async def _edit(self, vote_id: int, **kwargs):
+        tally = self.tallies.get(vote_id)
+        if tally is None:
+            return
+        content = render_vote(tally)
+        for channel_id, message_id in list(self._messages.get(vote_id, [])):
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                continue
+            try:
+                # A partial message edit needs no fetch; discord.py waits out the channel's rate limit bucket
+                await channel.get_partial_message(message_id).edit(content=content, **kwargs)
+            except discord.NotFound:
+                await self._forget(vote_id, message_id)
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to update message {message_id} of vote #{vote_id}: {e}")
+
+    async def _forget(self, vote_id: int, message_id: int):
+        messages = self._messages.get(vote_id, [])
+        self._messages[vote_id] = [entry for entry in messages if entry[1] != message_id]
+        await self.db.execute("DELETE FROM vote_messages WHERE vote_id = %s AND message_id = %s", (vote_id, message_id))
+
+    async def finish(self, vote_id: int):
+        """Show a vote's final results on its messages, remove the buttons and stop tracking it
+
+        Args:
+            vote_id (int): ID of the vote, already ended in the TallyCache
+        """
+        self._changed.discard(vote_id)
+        if vote_id not in self._messages:
+            return
+        await self._edit(vote_id, view=None)
+        self._messages.pop(vote_id, None)
+        await self.db.execute("DELETE FROM vote_messages WHERE vote_id = %s", (vote_id,))
+
+    async def update(self):
+        """Edit the messages of every vote that changed since the last update"""
+        changed, self._changed = self._changed, set()
+        for vote_id in changed:
+            await self._edit(vote_id)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.update()
+            except Exception as e:
+                logger.error(f"Error updating vote messages: {e}", exc_info=True)
+
+    async def close(self):
+        """Stop the background editor, applying any changes still waiting for an edit"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.update()
+        except Exception as e:
+            logger.warning(f"Could not apply final vote message updates: {e}")
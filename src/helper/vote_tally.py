@@ -0,0 +1,141 @@
+from helper.renfield_sql import Renfield_Pool
+
+
+class VoteTally:
+    """Running counts for a single vote"""
+
+    def __init__(self, vote_id: int, vote_name: str, options: list[str], creator_id: int, group_id: int | None, is_active: bool):
+        self.vote_id = vote_id
+        self.vote_name = vote_name
+        self.options = options
+        self.creator_id = creator_id
+        self.group_id = group_id
+        self.is_active = is_active
+        self.counts = [0] * len(options)  # Indexed like options
+        self.total = 0
+
+    def results(self):
+        """Every option with its count
+
+        Returns:
+            list[tuple[str, int]]: Option labels and counts, in option order
+        """
+        return list(zip(self.options, self.counts))
+
+    def winners(self):
+        """Options with the highest count
+
+        Returns:
+            list[str]: Winning options, more than one on a tie
+        """
+        max_votes = max(self.counts) if self.counts else 0
+        return [opt for opt, count in self.results() if count == max_votes]
+
+
+class TallyCache:
+    """Vote counts kept in memory and updated as ballots are accepted"""
+
+    def __init__(self, db: Renfield_Pool, persist: bool):
+        """Create the cache. Call load() before use
+
+        Args:
+            db (Renfield_Pool): Database pool
+            persist (bool): Write final counts to vote_tallies when a vote ends
+        """
+        self.db = db
+        self.persist = persist
+        self._votes: dict[int, VoteTally] = {}
+        self._groups: dict[int, list[int]] = {}  # group_id -> vote IDs, in creation order
+
+    async def load(self):
+        """Rebuild every tally from the database with one grouped query"""
+        async with self.db.connection() as conn:
+            votes = await conn.fetchall("SELECT id, creator_id, vote_name, group_id, is_active FROM votes")
+            options = await conn.fetchall("SELECT vote_id, option_index, label FROM vote_options ORDER BY vote_id, option_index")
+            counts = await conn.fetchall("SELECT vote_id, option_index, COUNT(*) AS count FROM votes_users GROUP BY vote_id, option_index")
+
+        labels: dict[int, list[str]] = {}
+        for row in options:
+            labels.setdefault(row["vote_id"], []).append(row["label"])
+
+        self._votes = {
+            vote["id"]: VoteTally(vote["id"], vote["vote_name"], labels.get(vote["id"], []), vote["creator_id"], vote["group_id"], bool(vote["is_active"]))
+            for vote in votes
+        }
+        self._groups = {}
+        for vote in votes:
+            if vote["group_id"] is not None:
+                self._groups.setdefault(vote["group_id"], []).append(vote["id"])
+
+        for row in counts:
+            tally = self._votes.get(row["vote_id"])
+            if tally is not None and row["option_index"] < len(tally.counts):
+                tally.counts[row["option_index"]] = row["count"]
+                tally.total += row["count"]
+
+    def get(self, vote_id: int):
+        """Look up a vote's tally
+
+        Args:
+            vote_id (int): ID of the vote
+
+        Returns:
+            VoteTally | None: The tally, or None if the vote does not exist
+        """
+        return self._votes.get(vote_id)
+
+    def active(self):
+        """Tallies of every vote still accepting ballots
+
+        Returns:
+            list[VoteTally]: Active tallies
+        """
+        return [tally for tally in self._votes.values() if tally.is_active]
+
+    def add_vote(self, vote_id: int, vote_name: str, options: list[str], creator_id: int, group_id: int | None):
+        """Start an empty tally for a newly created vote"""
+        self._votes[vote_id] = VoteTally(vote_id, vote_name, options, creator_id, group_id, True)
+        if group_id is not None:
+            self._groups.setdefault(group_id, []).append(vote_id)
+
+    def in_group(self, group_id: int):
+        """Tallies of every vote in a group
+
+        Args:
+            group_id (int): ID of the group
+
+        Returns:
+            list[VoteTally]: Tallies in creation order
+        """
+        return [self._votes[vote_id] for vote_id in self._groups.get(group_id, [])]
+
+    def record(self, vote_id: int, option_index: int):
+        """Count an accepted ballot
+
+        Args:
+            vote_id (int): ID of the vote
+            option_index (int): Index of the option voted for
+        """
+        tally = self._votes.get(vote_id)
+        if tally is not None:
+            tally.counts[option_index] += 1
+            tally.total += 1
+
+    async def end(self, vote_id: int):
+        """Mark a vote as ended and, if enabled, store its final counts in vote_tallies
+
+        Args:
+            vote_id (int): ID of the vote
+        """
+        tally = self._votes.get(vote_id)
+        if tally is None:
+            return
+        tally.is_active = False
+
+        if self.persist and tally.counts:
+            async with self.db.connection() as conn:
+                await conn.executemany(
+                    "INSERT INTO vote_tallies (vote_id, option_index, count) VALUES (%s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE count = VALUES(count)",
+                    [(vote_id, index, count) for index, count in enumerate(tally.counts)],
+                )